@@ -19,9 +19,32 @@ DST_VERIFY_SSL = True
 DST_USER = 'admin'
 DST_PASS = 'sua_senha_destino'
 
+# ==================== MÚLTIPLOS DESTINOS ====================
+
+# Lista de destinos (opcional). Quando definida, substitui as variáveis DST_*
+# e cada destino recebe o mesmo conjunto de torrents da origem, com histórico
+# e blacklist próprios. O .torrent é exportado da origem uma única vez.
+# Campos omitidos usam: port=443, use_https=True, verify_ssl=True,
+# user='admin', max_concurrency=DST_MAX_CONCURRENCY
+#
+# DESTINATIONS = [
+#     {'name': 'seedbox-a', 'host': 'qbit-a.meudominio.com.br', 'user': 'admin', 'pass': 'senha_a'},
+#     {'name': 'seedbox-b', 'host': 'qbit-b.meudominio.com.br', 'port': 8080,
+#      'use_https': False, 'user': 'admin', 'pass': 'senha_b'},
+# ]
+DESTINATIONS = None
+
 # ==================== BANCO DE DADOS ====================
 DATABASE_FILE = '/var/lib/qbit-clone/state.db'
 
+# Cache em disco dos .torrent exportados da origem (por infohash)
+# Evita exportar de novo após falhas, expiração da blacklist ou destino recriado
+# None = <diretório do DATABASE_FILE>/torrents
+TORRENT_CACHE_DIR = None
+
+# Tamanho máximo do cache em MB (os menos usados são removidos; 0 = desativado)
+TORRENT_CACHE_MAX_MB = 1024
+
 # Modo de limpeza:
 # 'delete' = Remove torrent E arquivos do destino
 # 'remove' = Remove apenas o torrent, mantém arquivos
@@ -43,13 +66,162 @@ START_PAUSED = False
 # False = Comportamento normal
 FORCE_UPLOAD = True
 
-# Delay entre migrações em segundos
-SYNC_INTERVAL = 0.5
+# Sincronização incremental via sync/maindata (somente modo --daemon)
+# True = Mantém em memória o último rid e um espelho das instâncias durante a
+#        sessão do daemon e baixa apenas as mudanças desde o ciclo anterior
+#        (o qBittorrent guarda o rid por sessão; cron e hook sempre fazem login
+#        novo e usam a lista completa)
+# False = Baixa a lista completa (torrents_info) a cada passo
+INCREMENTAL_SYNC = False
+
+# ==================== CONCORRÊNCIA ====================
+
+# Número de workers clonando em paralelo
+CLONE_WORKERS = 4
+
+# Máximo de requisições simultâneas por instância
+SRC_MAX_CONCURRENCY = 4
+DST_MAX_CONCURRENCY = 2
+
+# Tamanho do lote gravado no banco durante a clonagem
+DB_BATCH_SIZE = 100
+
+# Máximo de .torrent por requisição torrents_add (agrupados por save_path,
+# categoria, tags e auto_tmm) e tamanho máximo do corpo da requisição em MB
+ADD_BATCH_SIZE = 50
+ADD_BATCH_MAX_MB = 20
+
+# Espera máxima de um lote incompleto (adição ou force upload) antes de ser
+# enviado assim mesmo (segundos)
+ADD_BATCH_MAX_WAIT = 5
+
+# ==================== PRIORIDADE DE CLONAGEM ====================
+
+# Ordem da fila de clonagem: maior pontuação primeiro, somando
+# peso * log(1 + valor) de campos informados pela origem:
+# upspeed (B/s), num_incomplete (leechers), num_complete (seeders),
+# ratio, uploaded (bytes) e size (bytes). Peso negativo favorece valores
+# baixos. None = ordem devolvida pela API
+CLONE_PRIORITY_WEIGHTS = {
+    'upspeed': 1.0,
+    'num_incomplete': 1.0,
+    'num_complete': -0.25,
+    'ratio': 0.5,
+    'uploaded': 0.25,
+    'size': 0.0,
+}
+
+# ==================== RECONCILIAÇÃO ====================
+
+# Campos reaplicados nos torrents que já existem no destino quando mudam na
+# origem, em chamadas multi-hash agrupadas pelo valor novo:
+# 'category', 'tags' e 'save_path' (inclui auto_tmm; o local só é movido
+# quando a origem não usa auto_tmm). None = não reconcilia
+RECONCILE_FIELDS = ('category', 'tags', 'save_path')
+
+# ==================== CONEXÕES HTTP ====================
+
+# Conexões persistentes (keep-alive) mantidas no pool de cada instância
+# None = igual ao MAX_CONCURRENCY da instância
+# (por destino: 'http_pool_size' em DESTINATIONS)
+SRC_HTTP_POOL_SIZE = None
+DST_HTTP_POOL_SIZE = None
+
+# Tentativas em falhas de conexão e respostas 500/502/503/504 (inclusive POST,
+# usado pela API em info, export, add e delete)
+# (por destino: 'http_retries' em DESTINATIONS)
+SRC_HTTP_RETRIES = 3
+DST_HTTP_RETRIES = 3
+
+# Backoff exponencial entre tentativas (segundos: 0.5, 1, 2...)
+HTTP_RETRY_BACKOFF = 0.5
+
+# ==================== CONTROLE DE TAXA ====================
+
+# Taxa de requisições por instância (req/s), ajustada automaticamente:
+# sobe enquanto a WebUI responde rápido e cai pela metade com respostas
+# lentas, 403, 5xx ou timeouts. Substitui os delays fixos entre operações.
+RATE_LIMIT_INITIAL = 10
+RATE_LIMIT_MIN = 1
+RATE_LIMIT_MAX = 50          # por destino: 'max_rate' em DESTINATIONS
+
+# Latência acima da qual a instância é considerada ocupada (segundos); não vale
+# para listagens (torrents_info, sync_maindata), que demoram pelo tamanho
+RATE_TARGET_LATENCY = 2.0
+
+# Aumento aproximado da taxa (req/s) a cada segundo de respostas rápidas
+RATE_INCREASE = 5.0
+
+# ==================== CONFIRMAÇÃO ====================
+
+# Máximo de hashes por consulta/operação em lote na API
+HASH_CHUNK_SIZE = 500
+
+# Intervalo inicial e máximo entre verificações (segundos)
+CONFIRM_INITIAL_DELAY = 0.25
+CONFIRM_MAX_DELAY = 2.0
+
+# Tempo máximo para confirmar uma adição/remoção (segundos)
+CONFIRM_TIMEOUT = 10
+
+# Prazo máximo para os clonados saírem de checking/metaDL/allocating antes
+# de procurar torrents em download/erro (segundos)
+SETTLE_TIMEOUT = 60
+
+# ==================== FILA DO HOOK ====================
+
+# True = O hook apenas enfileira o hash; um único consumidor clona em lote
+# False = Cada execução do hook conecta e clona o hash diretamente
+HOOK_QUEUE = True
+
+# Espera antes de drenar a fila, para agrupar rajadas (segundos)
+HOOK_COALESCE_DELAY = 5
+
+# Máximo de hashes processados por lote
+HOOK_BATCH_SIZE = 500
+
+# Validade do cache de categorias no banco para hook e daemon (segundos):
+# dentro do prazo, criar/atualizar categorias não faz chamadas à API
+# (uma categoria ainda não vista força a leitura). None = sempre lê da API
+CATEGORY_CACHE_TTL = 600
+
+# ==================== DAEMON (--daemon) ====================
+
+# Intervalo entre verificações de mudança via sync/maindata (segundos)
+DAEMON_POLL_INTERVAL = 30
+
+# Intervalo máximo entre sincronizações completas (segundos)
+DAEMON_INTERVAL = 3600
+
+# Espera máxima entre tentativas de reconexão (segundos)
+DAEMON_RECONNECT_MAX_DELAY = 300
+
+# ==================== MÉTRICAS (PROMETHEUS) ====================
+
+# Porta do endpoint /metrics no modo daemon (None = desativado)
+METRICS_PORT = None
+METRICS_ADDR = '127.0.0.1'
+
+# Arquivo .prom gravado ao fim de cada execução (cron/hook), para o
+# textfile collector do node_exporter (None = desativado)
+# Ex: '/var/lib/node_exporter/textfile_collector/qbit_clone.prom'
+METRICS_TEXTFILE = None
 
 # ==================== LOGS ====================
 LOG_FILE = '/var/log/qbit-clone.log'
 VERBOSE = 1  # 0=erro, 1=normal, 2=debug
 
+# Formato do LOG_FILE: 'json' (uma linha JSON por erro, com sync_id,
+# destination e torrent para correlação) ou 'text' ([data] mensagem)
+LOG_FORMAT = 'json'
+
+# Rotação do LOG_FILE: feita pelo logrotate (ver readme), pois cron, hook e
+# daemon escrevem no mesmo arquivo
+
+# Dias mantidos no operation_log do banco; o restante vira agregado diário
+# (None = mantém tudo)
+OPLOG_RETENTION_DAYS = 90
+
 # ==================== FILTROS (OPCIONAL) ====================
 FILTER_CATEGORIES = None
 MIN_SIZE_GB = None
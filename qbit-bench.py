@@ -0,0 +1,980 @@
+#!/usr/bin/env python3
+"""
+qBittorrent Clone Tool - Benchmark com WebUI falsa
+
+Sobe instâncias falsas da WebUI do qBittorrent (auth, torrents/info, export,
+add, delete, setForceStart, categorias e sync/maindata) com latência, taxa de
+falhas e tamanho de biblioteca configuráveis, e roda execute_sync contra elas
+medindo tempo, chamadas à API e pico de memória de cada fase.
+
+Cada instância falsa roda em um processo separado, então a memória medida
+(tracemalloc) é só a do qbit-clone.
+
+Uso:
+    qbit-bench.py                                  # 1k, 10k e 100k torrents
+    qbit-bench.py --sizes 5000 --latency 0.02 --fail-rate 0.01
+    qbit-bench.py --sizes 10000 --incremental --set RATE_LIMIT_MAX=50
+    qbit-bench.py --serve 8080 --size 2000         # só a WebUI falsa
+"""
+
+import re
+import sys
+import ast
+import json
+import time
+import random
+import hashlib
+import secrets
+import argparse
+import tempfile
+import threading
+import resource
+import tracemalloc
+import importlib.util
+import multiprocessing
+import urllib.request
+from email import policy
+from email.parser import BytesParser
+from http.cookies import SimpleCookie
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from contextlib import contextmanager
+from collections import Counter
+from typing import Optional
+from urllib.parse import parse_qs
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+
+
+# ==================== WEBUI FALSA ====================
+
+# Estados agrupados pelos filtros da WebUI (qBittorrent 4.6)
+FILTER_STATES = {
+    'seeding': {'uploading', 'stalledUP', 'checkingUP', 'queuedUP', 'forcedUP'},
+    'downloading': {'downloading', 'metaDL', 'forcedMetaDL', 'stalledDL', 'checkingDL',
+                    'pausedDL', 'queuedDL', 'forcedDL', 'allocating'},
+    'errored': {'error', 'missingFiles'},
+    'paused': {'pausedUP', 'pausedDL'},
+    'completed': {'uploading', 'stalledUP', 'checkingUP', 'queuedUP', 'forcedUP', 'pausedUP'},
+}
+
+# Campos fixos de torrents/info (o restante vem de cada torrent)
+TORRENT_TEMPLATE = {
+    'amount_left': 0, 'availability': -1, 'completion_on': 0, 'dl_limit': -1,
+    'dlspeed': 0, 'downloaded': 0, 'downloaded_session': 0, 'eta': 8640000,
+    'f_l_piece_prio': False, 'infohash_v2': '', 'max_ratio': -1,
+    'max_seeding_time': -1, 'num_leechs': 0, 'num_seeds': 0, 'priority': 0,
+    'progress': 1, 'ratio_limit': -2, 'seeding_time_limit': -2, 'seen_complete': 0,
+    'seq_dl': False, 'super_seeding': False, 'tracker': 'https://tracker.exemplo.org/announce',
+    'trackers_count': 1, 'up_limit': -1, 'uploaded_session': 0,
+}
+
+# Fração aproximada de torrents fora de seeding na origem
+SRC_STATES = ('stalledUP',) * 12 + ('uploading', 'queuedUP', 'pausedUP', 'stalledDL')
+
+
+def make_torrent(seed: int, index: int, categories: int) -> dict:
+    """
+    Torrent determinístico a partir de (seed, índice)
+
+    Origem e destinos geram o mesmo torrent para o mesmo índice, então uma
+    cópia no destino tem os mesmos hash, nome, categoria e tamanho.
+    """
+    torrent_hash = hashlib.sha1(f'{seed}:{index}'.encode()).hexdigest()
+    n = int(torrent_hash[:12], 16)
+    category = f'cat{n % categories}' if categories else ''
+
+    return {
+        'hash': torrent_hash,
+        'name': f'Torrent.{index:07d}.{torrent_hash[:6]}',
+        'category': category,
+        'tags': '',
+        'save_path': f'/data/{category}' if category else '/data',
+        'size': (n % 50000 + 100) * 1024 * 1024,
+        'state': SRC_STATES[n % len(SRC_STATES)],
+        'ratio': (n >> 16) % 5000 / 1000,
+        'uploaded': (n >> 8) % (500 * 1024 ** 3),
+        'upspeed': (n >> 20) % 2_000_000 if n % 4 == 0 else 0,
+        'num_complete': (n >> 24) % 200,
+        'num_incomplete': (n >> 28) % 40,
+        'added_on': 1_600_000_000 + n % 100_000_000,
+        'auto_tmm': False,
+        'force_start': False,
+    }
+
+
+class FakeInstance:
+    """
+    Estado em memória de uma WebUI falsa do qBittorrent
+
+    Guarda só os campos variáveis de cada torrent e completa o resto na
+    serialização. Cada mudança incrementa a versão, usada como rid do
+    sync/maindata para responder deltas. Torrents adicionados entram em
+    checkingUP e assentam em stalledUP (ou, com bad_rate, em missingFiles /
+    downloading) após settle_delay segundos. Com drift, uma fração das
+    cópias no destino fica com categoria, tags e save_path desatualizados.
+    """
+
+    APP_VERSION = 'v4.6.0'
+    API_VERSION = '2.9.3'
+
+    def __init__(self, name: str, size: int = 0, seed: int = 1, missing: float = 0.0,
+                 orphans: int = 0, categories: int = 5, seeding_only: bool = False,
+                 bad_rate: float = 0.0, settle_delay: float = 0.0, latency: float = 0.0,
+                 jitter: float = 0.0, fail_rate: float = 0.0, torrent_kb: int = 16,
+                 drift: float = 0.0):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.fail_rate = fail_rate
+        self.bad_rate = bad_rate
+        self.settle_delay = settle_delay
+        self.torrent_kb = torrent_kb
+
+        self.lock = threading.Lock()
+        self.random = random.Random(f'{seed}:{name}')
+        self.sessions = set()
+        self.session = None      # SID da requisição em andamento (sob self.lock)
+        self.session_rids = {}   # SID -> último rid do sync/maindata entregue
+        self.version = 0
+        self.torrents = {}       # hash -> campos variáveis
+        self.versions = {}       # hash -> versão da última mudança
+        self.removed = []        # (versão, hash) removidos
+        self.settling = {}       # hash -> (instante, estado final)
+        self.categories = {}
+        self.stats = Counter()
+
+        for i in range(categories):
+            self.categories[f'cat{i}'] = {'name': f'cat{i}', 'savePath': f'/data/cat{i}'}
+
+        # Destino: cópia da origem sem `missing` e com `orphans` a mais
+        for i in range(size + orphans):
+            t = make_torrent(seed, i, categories)
+            if i < size:
+                if seeding_only and t['state'] not in FILTER_STATES['seeding']:
+                    continue
+                if missing and self.random.random() < missing:
+                    continue
+            if seeding_only:
+                t['state'] = 'stalledUP'
+            if i < size and drift and self.random.random() < drift:
+                t['category'] = f'cat{(int(t["hash"][:12], 16) + 1) % categories}' if categories else 'old'
+                t['save_path'] = '/data/old'
+                t['tags'] = 'old'
+            self._put(t)
+
+    # ---------- estado ----------
+
+    def _put(self, torrent: dict):
+        self.version += 1
+        self.torrents[torrent['hash']] = torrent
+        self.versions[torrent['hash']] = self.version
+
+    def _touch(self, torrent_hash: str):
+        self.version += 1
+        self.versions[torrent_hash] = self.version
+
+    def _settle(self):
+        """Aplica os estados finais dos torrents adicionados que já assentaram"""
+        if not self.settling:
+            return
+        now = time.monotonic()
+        for torrent_hash, (at, state) in list(self.settling.items()):
+            if at <= now:
+                del self.settling[torrent_hash]
+                t = self.torrents.get(torrent_hash)
+                if t is not None:
+                    t['state'] = state
+                    self._touch(torrent_hash)
+
+    @staticmethod
+    def _full(t: dict) -> dict:
+        """Torrent no formato completo de torrents/info"""
+        d = dict(TORRENT_TEMPLATE)
+        d.update(t)
+        d['infohash_v1'] = t['hash']
+        d['total_size'] = d['completed'] = t['size']
+        d['content_path'] = f"{t['save_path']}/{t['name']}"
+        d['magnet_uri'] = f"magnet:?xt=urn:btih:{t['hash']}&dn={t['name']}"
+        d['last_activity'] = d['added_on'] + 3600
+        d['seeding_time'] = d['time_active'] = 86400
+        return d
+
+    def _select(self, hashes: Optional[str]) -> list:
+        if not hashes or hashes == 'all':
+            return list(self.torrents)
+        return [h for h in hashes.lower().split('|') if h in self.torrents]
+
+    # ---------- endpoints ----------
+
+    def dispatch(self, endpoint: str, args: dict, files: list, sid: Optional[str]) -> tuple:
+        """
+        Executa um endpoint da API v2
+
+        Returns:
+            Tupla (status HTTP, corpo, headers extras); corpo str/bytes ou
+            objeto serializado como JSON
+        """
+        if endpoint == 'auth/login':
+            sid = secrets.token_hex(16)
+            with self.lock:
+                self.sessions.add(sid)
+            return 200, 'Ok.', {'Set-Cookie': f'SID={sid}; HttpOnly; path=/'}
+
+        if sid not in self.sessions:
+            return 403, 'Forbidden', {}
+
+        handler = self.ENDPOINTS.get(endpoint)
+        if handler is None:
+            return 404, 'Not Found', {}
+
+        with self.lock:
+            self._settle()
+            self.session = sid
+            return handler(self, args, files)
+
+    def auth_logout(self, args, files):
+        self.sessions.discard(self.session)
+        self.session_rids.pop(self.session, None)
+        return 200, '', {}
+
+    def app_version(self, args, files):
+        return 200, self.APP_VERSION, {}
+
+    def app_webapi_version(self, args, files):
+        return 200, self.API_VERSION, {}
+
+    def torrents_info(self, args, files):
+        states = FILTER_STATES.get(args.get('filter'))
+        category = args.get('category')
+        hashes = args.get('hashes')
+
+        result = []
+        for torrent_hash in self._select(hashes):
+            t = self.torrents[torrent_hash]
+            if states is not None and t['state'] not in states:
+                continue
+            if category is not None and t['category'] != category:
+                continue
+            result.append(self._full(t))
+
+        offset = int(args.get('offset') or 0)
+        limit = int(args.get('limit') or 0)
+        if offset or limit:
+            result = result[offset:offset + limit if limit else None]
+
+        return 200, result, {}
+
+    def torrents_export(self, args, files):
+        t = self.torrents.get((args.get('hash') or '').lower())
+        if t is None:
+            return 404, 'Not Found', {}
+
+        # Bencode mínimo com hash, nome e tamanho + padding até torrent_kb
+        name = t['name'].encode()
+        padding = b'x' * (self.torrent_kb * 1024)
+        data = (b'd4:hash40:' + t['hash'].encode() +
+                b'4:name' + str(len(name)).encode() + b':' + name +
+                b'4:sizei' + str(t['size']).encode() + b'e' +
+                b'7:padding' + str(len(padding)).encode() + b':' + padding + b'e')
+        return 200, data, {'Content-Type': 'application/x-bittorrent'}
+
+    TORRENT_RE = re.compile(rb'^d4:hash40:([0-9a-f]{40})4:name(\d+):')
+    SIZE_RE = re.compile(rb'4:sizei(\d+)e')
+
+    def torrents_add(self, args, files):
+        added = 0
+        for data in files:
+            match = self.TORRENT_RE.match(data)
+            if match is None:
+                continue
+            torrent_hash = match.group(1).decode()
+            if torrent_hash in self.torrents:
+                continue
+
+            start = match.end()
+            name = data[start:start + int(match.group(2))].decode()
+            size = self.SIZE_RE.search(data, start)
+            category = args.get('category') or ''
+            auto_tmm = args.get('autoTMM') == 'true'
+
+            torrent = make_torrent(0, 0, 0)
+            torrent.update({
+                'hash': torrent_hash,
+                'name': name,
+                'size': int(size.group(1)) if size else 0,
+                'category': category,
+                'tags': ', '.join(sorted(x.strip() for x in (args.get('tags') or '').split(',') if x.strip())),
+                'save_path': (self.categories.get(category, {}).get('savePath') if auto_tmm else None)
+                             or args.get('savepath') or '/data',
+                'auto_tmm': auto_tmm,
+                'ratio': 0.0,
+                'uploaded': 0,
+                'upspeed': 0,
+            })
+
+            stopped = 'true' in (args.get('paused'), args.get('stopped'))
+            final = 'pausedUP' if stopped else 'stalledUP'
+            if self.bad_rate and self.random.random() < self.bad_rate:
+                final = self.random.choice(('missingFiles', 'downloading'))
+
+            if self.settle_delay:
+                torrent['state'] = 'checkingUP'
+                self.settling[torrent_hash] = (time.monotonic() + self.settle_delay, final)
+            else:
+                torrent['state'] = final
+
+            self._put(torrent)
+            added += 1
+
+        return 200, 'Ok.' if added else 'Fails.', {}
+
+    def torrents_delete(self, args, files):
+        for torrent_hash in self._select(args.get('hashes')):
+            del self.torrents[torrent_hash]
+            self.versions.pop(torrent_hash, None)
+            self.settling.pop(torrent_hash, None)
+            self.version += 1
+            self.removed.append((self.version, torrent_hash))
+        return 200, '', {}
+
+    def torrents_set_force_start(self, args, files):
+        value = args.get('value') == 'true'
+        for torrent_hash in self._select(args.get('hashes')):
+            t = self.torrents[torrent_hash]
+            t['force_start'] = value
+            if value and t['state'] in ('stalledUP', 'uploading', 'queuedUP'):
+                t['state'] = 'forcedUP'
+            self._touch(torrent_hash)
+        return 200, '', {}
+
+    def torrents_set_category(self, args, files):
+        category = args.get('category') or ''
+        if category and category not in self.categories:
+            return 409, 'Incorrect category name', {}
+        for torrent_hash in self._select(args.get('hashes')):
+            t = self.torrents[torrent_hash]
+            t['category'] = category
+            if t['auto_tmm']:
+                t['save_path'] = self.categories.get(category, {}).get('savePath') or '/data'
+            self._touch(torrent_hash)
+        return 200, '', {}
+
+    def _edit_tags(self, args, add: bool):
+        tags = {tag.strip() for tag in (args.get('tags') or '').split(',') if tag.strip()}
+        for torrent_hash in self._select(args.get('hashes')):
+            t = self.torrents[torrent_hash]
+            current = {tag.strip() for tag in t['tags'].split(',') if tag.strip()}
+            current = current | tags if add else current - tags
+            t['tags'] = ', '.join(sorted(current))
+            self._touch(torrent_hash)
+        return 200, '', {}
+
+    def torrents_add_tags(self, args, files):
+        return self._edit_tags(args, True)
+
+    def torrents_remove_tags(self, args, files):
+        return self._edit_tags(args, False)
+
+    def torrents_set_location(self, args, files):
+        location = args.get('location') or ''
+        if not location:
+            return 400, 'Save path is empty', {}
+        for torrent_hash in self._select(args.get('hashes')):
+            t = self.torrents[torrent_hash]
+            t['save_path'] = location
+            t['auto_tmm'] = False
+            self._touch(torrent_hash)
+        return 200, '', {}
+
+    def torrents_set_auto_management(self, args, files):
+        enable = args.get('enable') == 'true'
+        for torrent_hash in self._select(args.get('hashes')):
+            t = self.torrents[torrent_hash]
+            t['auto_tmm'] = enable
+            if enable:
+                t['save_path'] = self.categories.get(t['category'], {}).get('savePath') or '/data'
+            self._touch(torrent_hash)
+        return 200, '', {}
+
+    def torrents_categories(self, args, files):
+        return 200, self.categories, {}
+
+    def torrents_create_category(self, args, files):
+        name = args.get('category') or ''
+        if not name or name in self.categories:
+            return 409, 'Category name is invalid', {}
+        self.categories[name] = {'name': name, 'savePath': args.get('savePath') or ''}
+        return 200, '', {}
+
+    def torrents_edit_category(self, args, files):
+        name = args.get('category') or ''
+        if name not in self.categories:
+            return 409, 'Category does not exist', {}
+        self.categories[name]['savePath'] = args.get('savePath') or ''
+        return 200, '', {}
+
+    def sync_maindata(self, args, files):
+        # Como no qBittorrent, o rid só vale na sessão que o recebeu: rid de
+        # outra sessão (login novo) recebe full_update
+        rid = int(args.get('rid') or 0)
+        full_update = rid <= 0 or rid != self.session_rids.get(self.session)
+        self.session_rids[self.session] = self.version
+
+        data = {'rid': self.version, 'server_state': {'connection_status': 'connected'}}
+        if full_update:
+            data['full_update'] = True
+            data['torrents'] = {h: self._full(t) for h, t in self.torrents.items()}
+            data['categories'] = self.categories
+        else:
+            data['torrents'] = {h: self._full(self.torrents[h])
+                                for h, v in self.versions.items() if v > rid}
+            data['torrents_removed'] = [h for v, h in self.removed if v > rid]
+
+        return 200, data, {}
+
+    ENDPOINTS = {
+        'auth/logout': auth_logout,
+        'app/version': app_version,
+        'app/webapiVersion': app_webapi_version,
+        'torrents/info': torrents_info,
+        'torrents/export': torrents_export,
+        'torrents/add': torrents_add,
+        'torrents/delete': torrents_delete,
+        'torrents/setForceStart': torrents_set_force_start,
+        'torrents/setCategory': torrents_set_category,
+        'torrents/addTags': torrents_add_tags,
+        'torrents/removeTags': torrents_remove_tags,
+        'torrents/setLocation': torrents_set_location,
+        'torrents/setAutoManagement': torrents_set_auto_management,
+        'torrents/categories': torrents_categories,
+        'torrents/createCategory': torrents_create_category,
+        'torrents/editCategory': torrents_edit_category,
+        'sync/maindata': sync_maindata,
+    }
+
+
+def parse_multipart(content_type: str, body: bytes) -> tuple[dict, list]:
+    """Campos e arquivos de um corpo multipart/form-data (torrents/add)"""
+    message = BytesParser(policy=policy.HTTP).parsebytes(
+        b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body)
+
+    fields = {}
+    files = []
+    for part in message.iter_parts():
+        payload = part.get_payload(decode=True) or b''
+        if part.get_filename():
+            files.append(payload)
+        else:
+            fields[part.get_param('name', header='content-disposition')] = payload.decode()
+
+    return fields, files
+
+
+def make_server(instance: FakeInstance, port: int = 0, addr: str = '127.0.0.1') -> ThreadingHTTPServer:
+    """Servidor HTTP/1.1 (keep-alive) da instância falsa"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            self._handle()
+
+        def do_POST(self):
+            self._handle()
+
+        def _handle(self):
+            path, _, query = self.path.partition('?')
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+
+            # Controle do benchmark (fora da contagem)
+            if path == '/bench/stats':
+                with instance.lock:
+                    stats = dict(instance.stats, torrents=len(instance.torrents))
+                return self._reply(200, stats)
+            if path == '/bench/reset':
+                with instance.lock:
+                    instance.stats.clear()
+                return self._reply(200, '')
+
+            endpoint = path.removeprefix('/api/v2/')
+
+            content_type = self.headers.get('Content-Type', '')
+            if content_type.startswith('multipart/form-data'):
+                args, files = parse_multipart(content_type, body)
+            else:
+                args, files = {}, []
+                for k, v in parse_qs(body.decode(), keep_blank_values=True).items():
+                    args[k] = v[-1]
+            for k, v in parse_qs(query, keep_blank_values=True).items():
+                args.setdefault(k, v[-1])
+
+            delay = instance.latency + (random.random() * instance.jitter if instance.jitter else 0)
+            if delay:
+                time.sleep(delay)
+
+            with instance.lock:
+                instance.stats[endpoint] += 1
+                fail = instance.fail_rate and endpoint != 'auth/login' and \
+                    instance.random.random() < instance.fail_rate
+                if fail:
+                    instance.stats['failures_injected'] += 1
+
+            if fail:
+                return self._reply(503, 'Service Unavailable')
+
+            cookie = SimpleCookie(self.headers.get('Cookie', ''))
+            sid = cookie['SID'].value if 'SID' in cookie else None
+            status, payload, headers = instance.dispatch(endpoint, args, files, sid)
+            self._reply(status, payload, headers)
+
+        def _reply(self, status: int, payload, headers: Optional[dict] = None):
+            headers = dict(headers or {})
+            if isinstance(payload, (dict, list)):
+                body = json.dumps(payload, separators=(',', ':')).encode()
+                headers.setdefault('Content-Type', 'application/json')
+            else:
+                body = payload if isinstance(payload, bytes) else payload.encode()
+                headers.setdefault('Content-Type', 'text/plain; charset=UTF-8')
+
+            self.send_response(status)
+            for k, v in headers.items():
+                self.send_header(k, v)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+            with instance.lock:
+                instance.stats['bytes_sent'] += len(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), Handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve_instance(spec: dict, conn):
+    """Alvo do processo filho: monta a instância e informa a porta ao pai"""
+    server = make_server(FakeInstance(**spec))
+    conn.send(server.server_address[1])
+    conn.close()
+    server.serve_forever()
+
+
+class FakeWebUI:
+    """Instância falsa em execução (processo filho ou thread local)"""
+
+    def __init__(self, spec: dict, in_process: bool = False):
+        self.name = spec['name']
+        self.process = None
+        self.server = None
+
+        if in_process:
+            self.server = make_server(FakeInstance(**spec))
+            self.port = self.server.server_address[1]
+            threading.Thread(target=self.server.serve_forever, name=f'fake-{self.name}', daemon=True).start()
+        else:
+            ctx = multiprocessing.get_context('spawn')
+            parent_conn, child_conn = ctx.Pipe(duplex=False)
+            self.process = ctx.Process(target=serve_instance, args=(spec, child_conn),
+                                       name=f'fake-{self.name}', daemon=True)
+            self.process.start()
+            if not parent_conn.poll(600):
+                self.stop()
+                raise RuntimeError(f"WebUI falsa {self.name} não iniciou")
+            self.port = parent_conn.recv()
+
+    def _call(self, path: str) -> dict:
+        with urllib.request.urlopen(f'http://127.0.0.1:{self.port}{path}', data=b'', timeout=30) as r:
+            body = r.read()
+        return json.loads(body) if body else {}
+
+    def stats(self) -> dict:
+        return self._call('/bench/stats')
+
+    def reset_stats(self):
+        self._call('/bench/reset')
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join(10)
+
+
+# ==================== PROFILER ====================
+
+class PhaseProfiler:
+    """
+    Tempo e pico de memória (tracemalloc) por fase
+
+    Uma thread amostra o pico do tracemalloc a cada `interval` segundos e o
+    atribui a todas as fases ativas naquele momento, o que funciona com fases
+    aninhadas e com os destinos rodando em paralelo. Sem track_memory mede
+    apenas o tempo (o tracemalloc deixa a execução 2-3x mais lenta).
+    """
+
+    def __init__(self, track_memory: bool = True, interval: float = 0.005):
+        self.track_memory = track_memory
+        self.interval = interval
+        self.phases = {}  # nome -> {'seconds', 'count', 'peak'}
+        self.peak = 0
+        self._active = {}
+        self._lock = threading.Lock()
+        self._running = False
+        self._thread = None
+
+    def _sample(self, reset: bool = True) -> int:
+        _, peak = tracemalloc.get_traced_memory()
+        if reset:
+            tracemalloc.reset_peak()
+        with self._lock:
+            for entry in self._active.values():
+                entry[0] = max(entry[0], peak)
+            self.peak = max(self.peak, peak)
+        return peak
+
+    def _sampler(self):
+        while self._running:
+            time.sleep(self.interval)
+            self._sample()
+
+    def start(self):
+        self.phases = {}
+        self.peak = 0
+        if self.track_memory:
+            tracemalloc.start()
+            self._running = True
+            self._thread = threading.Thread(target=self._sampler, name='profiler', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> int:
+        """Encerra a amostragem e retorna o pico geral (bytes)"""
+        if self.track_memory:
+            self._running = False
+            self._thread.join()
+            self._sample(reset=False)
+            tracemalloc.stop()
+        return self.peak
+
+    @contextmanager
+    def phase(self, name: str):
+        entry = [tracemalloc.get_traced_memory()[0] if self.track_memory else 0]
+        key = object()
+        with self._lock:
+            self._active[key] = entry
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            if self.track_memory:
+                self._sample(reset=False)
+            with self._lock:
+                del self._active[key]
+                stats = self.phases.setdefault(name, {'seconds': 0.0, 'count': 0, 'peak': 0})
+                stats['seconds'] += elapsed
+                stats['count'] += 1
+                stats['peak'] = max(stats['peak'], entry[0])
+
+
+def profiled_metrics(qc, profiler: PhaseProfiler):
+    """Metrics do qbit-clone cujos timers de fase também alimentam o profiler"""
+
+    class ProfiledMetrics(qc.Metrics):
+        @contextmanager
+        def timer(self, name: str, **labels):
+            if name != 'phase_duration_seconds':
+                with super().timer(name, **labels):
+                    yield
+                return
+
+            phase = labels['phase']
+            if 'destination' in labels:
+                phase = f"{phase}[{labels['destination']}]"
+            with profiler.phase(phase), super().timer(name, **labels):
+                yield
+
+    return ProfiledMetrics()
+
+
+# ==================== BENCHMARK ====================
+
+# Ajustes aplicados sobre o config.py do repositório
+BENCH_CONFIG = {
+    'VERBOSE': 0,
+    'METRICS_PORT': None,
+    'METRICS_TEXTFILE': None,
+    'FILTER_CATEGORIES': None,
+    'MIN_SIZE_GB': None,
+    'MIN_RATIO': None,
+    'MIN_UPLOAD_GB': None,
+    # Sem teto prático de taxa: mede o script, não o RateController
+    # (use --set RATE_LIMIT_MAX=50 para incluir o limite de produção)
+    'RATE_LIMIT_INITIAL': 1000,
+    'RATE_LIMIT_MAX': 1000,
+    # torrents/info de 100k torrents leva bem mais que 30s com tracemalloc
+    'REQUEST_TIMEOUT': 300,
+}
+
+
+def load_config(overrides: dict):
+    """config.py do repositório com os ajustes do benchmark, registrado como 'config'"""
+    spec = importlib.util.spec_from_file_location('config', BASE_DIR / 'config.py')
+    cfg = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(cfg)
+
+    for k, v in {**BENCH_CONFIG, **overrides}.items():
+        setattr(cfg, k, v)
+
+    sys.modules['config'] = cfg
+    return cfg
+
+
+def load_qbit_clone():
+    """Importa qbit-clone.py (usa o módulo 'config' já registrado)"""
+    spec = importlib.util.spec_from_file_location('qbit_clone', BASE_DIR / 'qbit-clone.py')
+    qc = importlib.util.module_from_spec(spec)
+    sys.modules['qbit_clone'] = qc
+    spec.loader.exec_module(qc)
+    return qc
+
+
+def parse_overrides(items: list) -> dict:
+    """--set CHAVE=VALOR (VALOR como literal Python; senão string)"""
+    overrides = {}
+    for item in items or []:
+        key, _, value = item.partition('=')
+        try:
+            overrides[key.strip()] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            overrides[key.strip()] = value
+    return overrides
+
+
+def api_calls(metrics) -> dict:
+    """
+    Chamadas feitas pelo cliente, de api_requests_total
+
+    Returns:
+        Dict instância -> {'methods': {método: total}, 'errors': falhas e recusas}
+    """
+    calls = {}
+    for (name, labels), value in list(metrics._values.items()):
+        if name != 'api_requests_total':
+            continue
+        labels = dict(labels)
+        entry = calls.setdefault(labels['instance'], {'methods': Counter(), 'errors': 0})
+        entry['methods'][labels['method']] += int(value)
+        if labels['result'] != 'ok':
+            entry['errors'] += int(value)
+    return {instance: {'methods': dict(e['methods']), 'errors': e['errors']} for instance, e in calls.items()}
+
+
+def run_once(qc, servers: list, profiler: PhaseProfiler, label: str, session: Optional[dict] = None) -> dict:
+    """
+    Uma execução completa, medida
+
+    Sem session é o modo cron (conecta e sincroniza); com session reaproveita
+    os clients e espelhos sync/maindata, como um ciclo do daemon.
+    """
+    qc.METRICS = profiled_metrics(qc, profiler)
+    for server in servers:
+        server.reset_stats()
+
+    profiler.start()
+    start = time.monotonic()
+    try:
+        qc.execute_sync(**(session or {}))
+    finally:
+        wall = time.monotonic() - start
+        peak = profiler.stop()
+
+    return {
+        'run': label,
+        'wall_seconds': round(wall, 3),
+        'peak_bytes': peak if profiler.track_memory else None,
+        'phases': profiler.phases,
+        'api_calls': api_calls(qc.METRICS),
+        'server': {server.name: server.stats() for server in servers},
+    }
+
+
+def run_size(qc, cfg, args, size: int, workdir: Path) -> list:
+    """Sobe origem e destinos com `size` torrents e roda sincronização inicial e estável"""
+    orphans = int(size * args.orphans)
+    common = {
+        'size': size, 'seed': args.seed, 'categories': args.categories,
+        'latency': args.latency, 'jitter': args.jitter, 'fail_rate': args.fail_rate,
+    }
+    specs = [dict(common, name='origem', torrent_kb=args.torrent_kb)]
+    specs += [
+        dict(common, name=f'bench-{i + 1}', missing=args.missing, orphans=orphans,
+             seeding_only=True, bad_rate=args.bad_rate, settle_delay=args.settle_delay,
+             drift=args.drift)
+        for i in range(args.destinations)
+    ]
+
+    log_progress(f"🏗️  {size} torrents: subindo {len(specs)} instâncias falsas...")
+    servers = []
+    try:
+        for spec in specs:
+            servers.append(FakeWebUI(spec, args.in_process))
+
+        run_dir = workdir / str(size)
+        run_dir.mkdir(parents=True, exist_ok=True)
+        cfg.SRC_HOST, cfg.SRC_PORT = '127.0.0.1', servers[0].port
+        cfg.SRC_USE_HTTPS, cfg.SRC_VERIFY_SSL = False, True
+        cfg.SRC_USER, cfg.SRC_PASS = 'admin', 'bench'
+        cfg.DESTINATIONS = [
+            {'name': s.name, 'host': '127.0.0.1', 'port': s.port, 'use_https': False,
+             'verify_ssl': True, 'user': 'admin', 'pass': 'bench'}
+            for s in servers[1:]
+        ]
+        cfg.DATABASE_FILE = str(run_dir / 'state.db')
+        cfg.TORRENT_CACHE_DIR = str(run_dir / 'torrents')
+        qc._torrent_cache = None
+
+        # --incremental: uma sessão com espelhos sync/maindata para as duas
+        # execuções, como o daemon (o rid não sobrevive a um login novo)
+        session = None
+        if args.incremental:
+            src, destinations = qc.get_clients()
+            session = {
+                'clients': (src, destinations),
+                'views': (qc.InstanceMirror(src, 'origem'),
+                          [qc.InstanceMirror(dst, dst.name) for dst in destinations]),
+            }
+
+        profiler = PhaseProfiler(track_memory=not args.no_memory)
+        results = []
+        for label in ('inicial', 'estável'):
+            log_progress(f"⏱️  {size} torrents: execução {label}...")
+            result = run_once(qc, servers, profiler, label, session)
+            result['size'] = size
+            results.append(result)
+            print_result(result)
+        return results
+    finally:
+        for server in servers:
+            server.stop()
+
+
+# ==================== RELATÓRIO ====================
+
+def log_progress(msg: str):
+    print(msg, file=sys.stderr, flush=True)
+
+
+def mb(value: Optional[int]) -> str:
+    return '-' if value is None else f"{value / 1024 / 1024:.1f}"
+
+
+def print_result(result: dict):
+    print(f"\n{'=' * 64}")
+    print(f"📊 {result['size']} torrents | execução {result['run']}")
+    print(f"  Tempo total: {result['wall_seconds']:.2f}s | Pico de memória: {mb(result['peak_bytes'])} MB")
+
+    print(f"\n  {'Fase':<32}{'Tempo (s)':>12}{'Pico (MB)':>12}")
+    for phase, stats in result['phases'].items():
+        peak = stats['peak'] if result['peak_bytes'] is not None else None
+        print(f"  {phase:<32}{stats['seconds']:>12.3f}{mb(peak):>12}")
+
+    print(f"\n  Chamadas à API (cliente):")
+    for instance, calls in result['api_calls'].items():
+        detail = ', '.join(f"{m} {n}" for m, n in sorted(calls['methods'].items()))
+        print(f"    {instance}: {sum(calls['methods'].values())} | {calls['errors']} com erro ({detail})")
+
+    print(f"\n  Requisições recebidas (servidor, inclui login e retentativas):")
+    for instance, stats in result['server'].items():
+        requests = sum(v for k, v in stats.items() if '/' in k)
+        failures = stats.get('failures_injected', 0)
+        print(f"    {instance}: {requests} requisições | {mb(stats.get('bytes_sent', 0))} MB enviados | "
+              f"{failures} falhas injetadas | {stats['torrents']} torrents")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark do qbit-clone contra WebUIs falsas do qBittorrent')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Tamanhos da biblioteca da origem (padrão: 1000 10000 100000)')
+    parser.add_argument('--destinations', type=int, default=1, help='Número de destinos (padrão: 1)')
+    parser.add_argument('--missing', type=float, default=0.05,
+                        help='Fração da origem ausente em cada destino (padrão: 0.05)')
+    parser.add_argument('--orphans', type=float, default=0.01,
+                        help='Órfãos no destino, como fração da origem (padrão: 0.01)')
+    parser.add_argument('--drift', type=float, default=0.0,
+                        help='Fração dos torrents do destino com categoria/tags/local desatualizados (padrão: 0)')
+    parser.add_argument('--bad-rate', type=float, default=0.01,
+                        help='Fração dos adicionados que termina em erro/download (padrão: 0.01)')
+    parser.add_argument('--settle-delay', type=float, default=0.0,
+                        help='Segundos em checkingUP após adicionar (padrão: 0)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Latência por requisição (s)')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Latência extra aleatória até N segundos')
+    parser.add_argument('--fail-rate', type=float, default=0.0, help='Fração de requisições respondidas com 503')
+    parser.add_argument('--categories', type=int, default=5, help='Número de categorias (padrão: 5)')
+    parser.add_argument('--torrent-kb', type=int, default=16, help='Tamanho de cada .torrent exportado (KB)')
+    parser.add_argument('--seed', type=int, default=1, help='Semente da biblioteca gerada')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Simula o daemon com INCREMENTAL_SYNC: uma sessão e espelhos sync/maindata '
+                             'mantidos entre as execuções')
+    parser.add_argument('--no-memory', action='store_true', help='Não mede memória (sem overhead do tracemalloc)')
+    parser.add_argument('--in-process', action='store_true',
+                        help='WebUIs falsas em threads no mesmo processo (memória inclui o servidor)')
+    parser.add_argument('--set', action='append', metavar='CHAVE=VALOR',
+                        help='Sobrescreve uma opção do config.py (pode repetir)')
+    parser.add_argument('--workdir', help='Diretório para banco, cache e log (padrão: temporário)')
+    parser.add_argument('--json', metavar='ARQUIVO', help='Grava os resultados em JSON')
+    parser.add_argument('--verbose', type=int, default=0, help='VERBOSE do qbit-clone durante as execuções')
+    parser.add_argument('--serve', type=int, metavar='PORTA',
+                        help='Apenas sobe uma WebUI falsa na porta (use com --size)')
+    parser.add_argument('--size', type=int, default=1000, help='Torrents da WebUI falsa em --serve')
+    args = parser.parse_args()
+
+    if args.serve is not None:
+        instance = FakeInstance('serve', size=args.size, seed=args.seed, categories=args.categories,
+                                latency=args.latency, jitter=args.jitter, fail_rate=args.fail_rate,
+                                bad_rate=args.bad_rate, settle_delay=args.settle_delay,
+                                torrent_kb=args.torrent_kb)
+        server = make_server(instance, args.serve, '0.0.0.0')
+        log_progress(f"🧪 WebUI falsa com {len(instance.torrents)} torrents em http://0.0.0.0:{args.serve}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix='qbit-bench-'))
+    workdir.mkdir(parents=True, exist_ok=True)
+
+    overrides = parse_overrides(args.set)
+    overrides.setdefault('VERBOSE', args.verbose)
+    overrides.setdefault('LOG_FILE', str(workdir / 'qbit-clone.log'))
+
+    cfg = load_config(overrides)
+    qc = load_qbit_clone()
+    log_progress(f"📁 Banco, cache e log em {workdir}")
+
+    results = []
+    for size in args.sizes:
+        results.extend(run_size(qc, cfg, args, size, workdir))
+
+    print(f"\n{'=' * 64}")
+    print(f"  {'Torrents':>10}  {'Execução':<10}{'Tempo (s)':>12}{'Chamadas':>12}{'Pico (MB)':>12}")
+    for r in results:
+        calls = sum(sum(c['methods'].values()) for c in r['api_calls'].values())
+        print(f"  {r['size']:>10}  {r['run']:<10}{r['wall_seconds']:>12.2f}{calls:>12}{mb(r['peak_bytes']):>12}")
+    print(f"  RSS máximo do processo: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        log_progress(f"💾 Resultados em {args.json}")
+
+
+if __name__ == "__main__":
+    main()
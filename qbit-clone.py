@@ -7,16 +7,37 @@ Recursos:
 - Blacklist automática de torrents problemáticos (download/erro)
 - Limpeza automática da blacklist (remove se não existe mais na origem)
 - Operações em lote no banco de dados (batch)
+- Clonagem paralela com limite de concorrência por instância
 - Force upload opcional nos torrents clonados
-- Aguarda 10s após clonar para verificar estados
+- Aguarda os clonados saírem de checking/metaDL antes de verificar estados
 
-Uso: qbit-migrate.py [HASH]
+Uso: qbit-migrate.py [HASH] | qbit-migrate.py --daemon | qbit-migrate.py --drain-queue
 """
 
+import os
 import sys
+import json
+import hashlib
+import math
 import time
+import fcntl
+import signal
+import argparse
+import subprocess
 import urllib3
 import sqlite3
+import threading
+import atexit
+import queue
+import uuid
+import logging
+import contextvars
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from contextlib import contextmanager
+from functools import partial
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from typing import Optional, List
 from pathlib import Path
 from datetime import datetime
@@ -31,281 +52,791 @@ except ImportError:
     sys.exit(1)
 
 try:
-    from qbittorrentapi import Client
+    from qbittorrentapi import Client, APIConnectionError, HTTPError, HTTP5XXError, Forbidden403Error
 except ImportError:
     print("❌ ERRO: pip install qbittorrent-api")
     sys.exit(1)
 
-if not config.SRC_VERIFY_SSL or not config.DST_VERIFY_SSL:
+def get_destination_configs() -> list:
+    """
+    Lista de destinos configurados
+    
+    Usa DESTINATIONS quando definido; senão monta um destino único chamado
+    'destino' a partir das variáveis DST_* (configuração legada).
+    """
+    destinations = getattr(config, 'DESTINATIONS', None)
+    if destinations:
+        return [{
+            'name': d['name'],
+            'host': d['host'],
+            'port': d.get('port', 443),
+            'use_https': d.get('use_https', True),
+            'verify_ssl': d.get('verify_ssl', True),
+            'user': d.get('user', 'admin'),
+            'pass': d.get('pass', ''),
+            'max_concurrency': d.get('max_concurrency', getattr(config, 'DST_MAX_CONCURRENCY', 2)),
+            'max_rate': d.get('max_rate', getattr(config, 'RATE_LIMIT_MAX', 50)),
+            'http_pool_size': d.get('http_pool_size', getattr(config, 'DST_HTTP_POOL_SIZE', None)),
+            'http_retries': d.get('http_retries', getattr(config, 'DST_HTTP_RETRIES', 3)),
+        } for d in destinations]
+    
+    return [{
+        'name': 'destino',
+        'host': config.DST_HOST,
+        'port': config.DST_PORT,
+        'use_https': config.DST_USE_HTTPS,
+        'verify_ssl': config.DST_VERIFY_SSL,
+        'user': config.DST_USER,
+        'pass': config.DST_PASS,
+        'max_concurrency': getattr(config, 'DST_MAX_CONCURRENCY', 2),
+        'max_rate': getattr(config, 'RATE_LIMIT_MAX', 50),
+        'http_pool_size': getattr(config, 'DST_HTTP_POOL_SIZE', None),
+        'http_retries': getattr(config, 'DST_HTTP_RETRIES', 3),
+    }]
+
+
+if not config.SRC_VERIFY_SSL or not all(d['verify_ssl'] for d in get_destination_configs()):
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
+# ==================== MÉTRICAS ====================
+
+class Metrics:
+    """
+    Registro de métricas no formato texto do Prometheus (sem dependências)
+    
+    Contadores, gauges e histogramas com labels. Em modo daemon é servido por
+    HTTP (METRICS_PORT); nos demais modos é gravado ao fim da execução em
+    METRICS_TEXTFILE para o textfile collector do node_exporter.
+    """
+    
+    PREFIX = 'qbit_clone_'
+    
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+    
+    # nome -> (tipo, descrição)
+    DEFINITIONS = {
+        'phase_duration_seconds': ('histogram', 'Duração de cada fase da sincronização'),
+        'api_request_duration_seconds': ('histogram', 'Latência das chamadas à WebUI por instância e método'),
+        'api_requests_total': ('counter', 'Chamadas à WebUI por instância, método e resultado'),
+        'db_transaction_duration_seconds': ('histogram', 'Duração das transações de escrita no SQLite'),
+        'operations_total': ('counter', 'Operações por tipo, destino e resultado'),
+        'torrent_cache_total': ('counter', 'Leituras do cache de .torrent (hit/miss)'),
+        'hook_queue_depth': ('gauge', 'Hashes aguardando na fila do hook'),
+        'rate_limit_requests_per_second': ('gauge', 'Taxa atual do controle de taxa por instância'),
+        'last_sync_timestamp_seconds': ('gauge', 'Fim da última sincronização completa (unix time)'),
+    }
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}  # (nome, labels) -> valor ou [buckets, soma, total]
+    
+    @staticmethod
+    def _key(name: str, labels: dict) -> tuple:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+    
+    def inc(self, name: str, value: float = 1, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+    
+    def set(self, name: str, value: float, **labels):
+        with self._lock:
+            self._values[self._key(name, labels)] = value
+    
+    def observe(self, name: str, value: float, **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            hist = self._values.get(key)
+            if hist is None:
+                hist = self._values[key] = [[0] * len(self.BUCKETS), 0.0, 0]
+            for i, bound in enumerate(self.BUCKETS):
+                if value <= bound:
+                    hist[0][i] += 1
+            hist[1] += value
+            hist[2] += 1
+    
+    @contextmanager
+    def timer(self, name: str, **labels):
+        """Observa a duração do bloco no histograma `name`"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - start, **labels)
+    
+    @staticmethod
+    def _labels(labels: tuple, extra: str = '') -> str:
+        parts = []
+        for k, v in labels:
+            v = v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+            parts.append(f'{k}="{v}"')
+        if extra:
+            parts.append(extra)
+        return '{' + ','.join(parts) + '}' if parts else ''
+    
+    def render(self) -> str:
+        """Exposição no formato texto 0.0.4 do Prometheus"""
+        with self._lock:
+            items = [
+                (key, [list(value[0]), value[1], value[2]] if isinstance(value, list) else value)
+                for key, value in sorted(self._values.items())
+            ]
+        
+        lines = []
+        described = set()
+        for (name, labels), value in items:
+            kind, help_text = self.DEFINITIONS.get(name, ('untyped', name))
+            metric = self.PREFIX + name
+            
+            if name not in described:
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} {kind}")
+                described.add(name)
+            
+            if kind == 'histogram':
+                buckets, total_sum, count = value
+                for bound, bucket_count in zip(self.BUCKETS + ('+Inf',), buckets + [count]):
+                    le = self._labels(labels, f'le="{bound}"')
+                    lines.append(f"{metric}_bucket{le} {bucket_count}")
+                lines.append(f"{metric}_sum{self._labels(labels)} {total_sum}")
+                lines.append(f"{metric}_count{self._labels(labels)} {count}")
+            else:
+                lines.append(f"{metric}{self._labels(labels)} {value}")
+        
+        return '\n'.join(lines) + '\n'
+    
+    def write_textfile(self, path: str):
+        """Grava atomicamente para o textfile collector (escreve .tmp e renomeia)"""
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp, 'w') as f:
+                f.write(self.render())
+            os.replace(tmp, path)
+        except OSError as e:
+            log_error(f"Metrics textfile write failed {path}: {e}")
+    
+    def serve(self, port: int, addr: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Serve /metrics em uma thread de fundo"""
+        metrics = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, *args):
+                pass
+        
+        server = ThreadingHTTPServer((addr, port), Handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='metrics', daemon=True).start()
+        return server
+
+
+METRICS = Metrics()
+
+
+def write_metrics_textfile():
+    """Grava METRICS_TEXTFILE, se configurado (modos cron, hook e --drain-queue)"""
+    path = getattr(config, 'METRICS_TEXTFILE', None)
+    if path:
+        METRICS.write_textfile(path)
+
+
 # ==================== DATABASE ====================
 
+# Máximo de parâmetros por statement (limite antigo do SQLite é 999)
+SQLITE_MAX_PARAMS = 500
+
+
 class SyncDatabase:
-    """Banco de dados otimizado com blacklist inteligente"""
+    """
+    Banco de dados otimizado com blacklist inteligente
     
-    def __init__(self, db_path: str):
+    Mantém uma única conexão aberta (WAL, synchronous=NORMAL) compartilhada
+    entre threads. Escritas acontecem dentro de transaction(), que pode ser
+    aninhada: só o escopo mais externo faz COMMIT, então uma fase inteira da
+    sincronização pode ser gravada de uma vez.
+    
+    Histórico de clonagem e blacklist são mantidos por destino; a migração de
+    bancos antigos (sem coluna destination) atribui as linhas existentes a
+    `default_destination`.
+    """
+    
+    def __init__(self, db_path: str, default_destination: str = 'destino'):
         self.db_path = db_path
+        self.default_destination = default_destination
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        
+        # isolation_level=None: transações controladas explicitamente em transaction()
+        self.conn = sqlite3.connect(
+            self.db_path,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=256
+        )
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA busy_timeout=30000')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+        
+        self._lock = threading.RLock()
+        self._tx_depth = 0
+        
         self._init_database()
     
+    @contextmanager
+    def transaction(self):
+        """
+        Escopo de transação explícito (reentrante)
+        
+        BEGIN IMMEDIATE reserva a escrita logo no início, evitando 'database is
+        locked' quando hooks e a sincronização completa gravam ao mesmo tempo
+        (o busy_timeout cuida da espera).
+        """
+        with self._lock:
+            outermost = self._tx_depth == 0
+            if outermost:
+                start = time.monotonic()
+                self.conn.execute('BEGIN IMMEDIATE')
+            self._tx_depth += 1
+            
+            try:
+                yield self.conn.cursor()
+            except BaseException:
+                self._tx_depth -= 1
+                if outermost:
+                    self.conn.execute('ROLLBACK')
+                raise
+            
+            self._tx_depth -= 1
+            if outermost:
+                self.conn.execute('COMMIT')
+                METRICS.observe('db_transaction_duration_seconds', time.monotonic() - start)
+    
+    def close(self):
+        """Fecha a conexão"""
+        with self._lock:
+            self.conn.close()
+    
+    # Tabelas que passaram a ser por destino (schema v2) e suas colunas antigas
+    PER_DESTINATION_TABLES = {
+        'cloned_torrents': 'hash, name, category, size_bytes, cloned_at',
+        'blacklist_torrents': 'hash, name, reason, blacklisted_at, attempts',
+    }
+    
     def _init_database(self):
         """Cria estrutura do banco"""
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self.transaction() as cursor:
+            # Schema v1 (sem destino): renomeia para copiar depois em _migrate
+            for table in self.PER_DESTINATION_TABLES:
+                columns = self._columns(cursor, table)
+                if columns and 'destination' not in columns:
+                    cursor.execute(f'ALTER TABLE {table} RENAME TO {table}_v1')
+            
+            # TABELA 1: State da origem (atualizada por diff a cada execução)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS state_origem (
+                    hash TEXT PRIMARY KEY,
+                    name TEXT,
+                    category TEXT,
+                    size_bytes INTEGER,
+                    state TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # TABELA 2: Histórico de clonagens por destino (APPEND ONLY)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS cloned_torrents (
+                    destination TEXT,
+                    hash TEXT,
+                    name TEXT,
+                    category TEXT,
+                    size_bytes INTEGER,
+                    cloned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (destination, hash)
+                )
+            ''')
+            
+            # TABELA 3: Log de operações
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS operation_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    operation TEXT,
+                    torrent_hash TEXT,
+                    torrent_name TEXT,
+                    details TEXT,
+                    destination TEXT
+                )
+            ''')
+            
+            # TABELA 4: Blacklist de torrents problemáticos por destino
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS blacklist_torrents (
+                    destination TEXT,
+                    hash TEXT,
+                    name TEXT,
+                    reason TEXT,
+                    blacklisted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    attempts INTEGER DEFAULT 1,
+                    PRIMARY KEY (destination, hash)
+                )
+            ''')
+            
+            # TABELA 5: Fila de hashes enviados pelo hook
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS hook_queue (
+                    hash TEXT PRIMARY KEY,
+                    enqueued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # TABELA 6: Contadores de operações por hora (mantidos por trigger)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS operation_stats_hourly (
+                    hour TEXT,
+                    operation TEXT,
+                    count INTEGER DEFAULT 0,
+                    PRIMARY KEY (hour, operation)
+                )
+            ''')
+            
+            # TABELA 7: Agregados diários do log compactado
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS operation_stats_daily (
+                    day TEXT,
+                    operation TEXT,
+                    count INTEGER DEFAULT 0,
+                    PRIMARY KEY (day, operation)
+                )
+            ''')
+            
+            # TABELA 8: Cache de categorias por instância
+            # (source_fingerprint: origem já aplicada neste destino)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS category_state (
+                    instance TEXT PRIMARY KEY,
+                    categories TEXT,
+                    fingerprint TEXT,
+                    source_fingerprint TEXT,
+                    fetched_at REAL
+                )
+            ''')
+            
+            cursor.execute('''
+                CREATE TRIGGER IF NOT EXISTS trg_operation_log_hourly
+                AFTER INSERT ON operation_log
+                BEGIN
+                    INSERT INTO operation_stats_hourly (hour, operation, count)
+                    VALUES (strftime('%Y-%m-%d %H:00:00', NEW.timestamp), NEW.operation, 1)
+                    ON CONFLICT(hour, operation) DO UPDATE SET count = count + 1;
+                END
+            ''')
+            
+            self._migrate(cursor)
+            
+            # Índices para performance
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_cloned_hash ON cloned_torrents(hash)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_state_hash ON state_origem(hash)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_blacklist_hash ON blacklist_torrents(hash)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_operation_log_timestamp ON operation_log(timestamp)')
+    
+    def _migrate(self, cursor):
+        """Migrações de dados entre versões do schema (PRAGMA user_version)"""
+        cursor.execute('PRAGMA user_version')
+        version = cursor.fetchone()[0]
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # TABELA 1: State da origem (SOBRESCREVE a cada execução)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS state_origem (
-                hash TEXT PRIMARY KEY,
-                name TEXT,
-                category TEXT,
-                size_bytes INTEGER,
-                state TEXT,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # TABELA 2: Histórico de clonagens (APPEND ONLY)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cloned_torrents (
-                hash TEXT PRIMARY KEY,
-                name TEXT,
-                category TEXT,
-                size_bytes INTEGER,
-                cloned_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # TABELA 3: Log de operações
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS operation_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                operation TEXT,
-                torrent_hash TEXT,
-                torrent_name TEXT,
-                details TEXT
-            )
-        ''')
-        
-        # TABELA 4: Blacklist de torrents problemáticos
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS blacklist_torrents (
-                hash TEXT PRIMARY KEY,
-                name TEXT,
-                reason TEXT,
-                blacklisted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                attempts INTEGER DEFAULT 1
-            )
-        ''')
-        
-        # Índices para performance
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_cloned_hash ON cloned_torrents(hash)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_state_hash ON state_origem(hash)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_blacklist_hash ON blacklist_torrents(hash)')
-        
-        conn.commit()
-        conn.close()
-    
-    def update_state_origem(self, torrents: list):
-        """SOBRESCREVE tabela state_origem com snapshot atual (BATCH)"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM state_origem')
-        
-        batch = [(t.hash, t.name, t.category or '', t.size, t.state) for t in torrents]
-        cursor.executemany('''
-            INSERT INTO state_origem (hash, name, category, size_bytes, state)
-            VALUES (?, ?, ?, ?, ?)
-        ''', batch)
-        
-        conn.commit()
-        conn.close()
-    
-    def get_state_origem_hashes(self) -> set:
-        """Retorna set de hashes na origem"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT hash FROM state_origem')
-        hashes = {row[0] for row in cursor.fetchall()}
-        conn.close()
-        return hashes
+        if version < 1:
+            # Contadores horários a partir do log já existente
+            cursor.execute('''
+                INSERT OR REPLACE INTO operation_stats_hourly (hour, operation, count)
+                SELECT strftime('%Y-%m-%d %H:00:00', timestamp), operation, COUNT(*)
+                FROM operation_log
+                GROUP BY 1, 2
+            ''')
+            cursor.execute('PRAGMA user_version = 1')
+        
+        if version < 2:
+            # Histórico e blacklist passam a ser por destino
+            for table, columns in self.PER_DESTINATION_TABLES.items():
+                if not self._columns(cursor, f'{table}_v1'):
+                    continue
+                cursor.execute(f'''
+                    INSERT OR IGNORE INTO {table} (destination, {columns})
+                    SELECT ?, {columns} FROM {table}_v1
+                ''', (self.default_destination,))
+                cursor.execute(f'DROP TABLE {table}_v1')
+            
+            if 'destination' not in self._columns(cursor, 'operation_log'):
+                cursor.execute('ALTER TABLE operation_log ADD COLUMN destination TEXT')
+            
+            cursor.execute('PRAGMA user_version = 2')
+        
+        if version < 3:
+            # Espelho incremental passou a ficar só em memória (sessão do daemon)
+            cursor.execute('DROP TABLE IF EXISTS mirror_torrents')
+            cursor.execute('DROP TABLE IF EXISTS sync_rid')
+            cursor.execute('PRAGMA user_version = 3')
+    
+    @staticmethod
+    def _columns(cursor, table: str) -> set:
+        """Colunas de uma tabela (vazio se não existe)"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        return {row[1] for row in cursor.fetchall()}
+    
+    def update_state_origem(self, torrents: list) -> dict:
+        """
+        Atualiza state_origem com o snapshot atual de forma diferencial (BATCH)
+        
+        Insere apenas hashes novos, atualiza apenas linhas cujo estado,
+        categoria ou tamanho mudou e remove apenas hashes que sumiram.
+        
+        Returns:
+            Dict com listas 'added', 'changed', 'removed' e o set 'hashes'
+            de todos os hashes do snapshot
+        """
+        snapshot = {t.hash: t for t in torrents}
+        
+        with self.transaction() as cursor:
+            cursor.execute('SELECT hash, category, size_bytes, state FROM state_origem')
+            current = {row[0]: row[1:] for row in cursor.fetchall()}
+            
+            added = [t for h, t in snapshot.items() if h not in current]
+            changed = [
+                t for h, t in snapshot.items()
+                if h in current and current[h] != (t.category or '', t.size, t.state)
+            ]
+            removed = [h for h in current if h not in snapshot]
+            
+            if added:
+                cursor.executemany('''
+                    INSERT INTO state_origem (hash, name, category, size_bytes, state)
+                    VALUES (?, ?, ?, ?, ?)
+                ''', [(t.hash, t.name, t.category or '', t.size, t.state) for t in added])
+            
+            if changed:
+                cursor.executemany('''
+                    UPDATE state_origem
+                    SET name = ?, category = ?, size_bytes = ?, state = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE hash = ?
+                ''', [(t.name, t.category or '', t.size, t.state, t.hash) for t in changed])
+            
+            if removed:
+                cursor.executemany('DELETE FROM state_origem WHERE hash = ?', [(h,) for h in removed])
+        
+        return {
+            'added': [t.hash for t in added],
+            'changed': [t.hash for t in changed],
+            'removed': removed,
+            'hashes': set(snapshot)
+        }
     
-    def get_blacklist_hashes(self) -> set:
-        """Retorna set de hashes na blacklist"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('SELECT hash FROM blacklist_torrents')
-        hashes = {row[0] for row in cursor.fetchall()}
-        conn.close()
+    def get_blacklist_hashes(self, destination: str) -> set:
+        """Retorna set de hashes na blacklist do destino"""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute('SELECT hash FROM blacklist_torrents WHERE destination = ?', (destination,))
+            hashes = {row[0] for row in cursor.fetchall()}
         return hashes
     
-    def add_to_blacklist_batch(self, torrents: List[tuple]):
+    def add_to_blacklist_batch(self, torrents: List[tuple], destination: str):
         """
-        Adiciona múltiplos torrents à blacklist
+        Adiciona múltiplos torrents à blacklist do destino
         
         Args:
             torrents: Lista de tuplas (hash, name, reason)
+            destination: Nome do destino
         """
         if not torrents:
             return
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.transaction() as cursor:
+            # Insert ou update
+            for hash, name, reason in torrents:
+                cursor.execute('''
+                    INSERT INTO blacklist_torrents (destination, hash, name, reason, attempts)
+                    VALUES (?, ?, ?, ?, 1)
+                    ON CONFLICT(destination, hash) DO UPDATE SET
+                        attempts = attempts + 1,
+                        blacklisted_at = CURRENT_TIMESTAMP,
+                        reason = excluded.reason
+                ''', (destination, hash, name, reason))
+            
+            # Log
+            log_batch = [(
+                'BLACKLIST',
+                t[0],  # hash
+                t[1],  # name
+                f'Reason: {t[2]}',
+                destination
+            ) for t in torrents]
+            
+            cursor.executemany('''
+                INSERT INTO operation_log (operation, torrent_hash, torrent_name, details, destination)
+                VALUES (?, ?, ?, ?, ?)
+            ''', log_batch)
+    
+    def cleanup_blacklist(self) -> int:
+        """
+        Remove da blacklist (de todos os destinos) torrents que não existem
+        mais na origem
         
-        # Insert ou update
-        for hash, name, reason in torrents:
-            cursor.execute('''
-                INSERT INTO blacklist_torrents (hash, name, reason, attempts)
-                VALUES (?, ?, ?, 1)
-                ON CONFLICT(hash) DO UPDATE SET
-                    attempts = attempts + 1,
-                    blacklisted_at = CURRENT_TIMESTAMP,
-                    reason = excluded.reason
-            ''', (hash, name, reason))
-        
-        # Log
-        log_batch = [(
-            'BLACKLIST',
-            t[0],  # hash
-            t[1],  # name
-            f'Reason: {t[2]}'
-        ) for t in torrents]
-        
-        cursor.executemany('''
-            INSERT INTO operation_log (operation, torrent_hash, torrent_name, details)
-            VALUES (?, ?, ?, ?)
-        ''', log_batch)
-        
-        conn.commit()
-        conn.close()
-    
-    def cleanup_blacklist(self, origem_hashes: set) -> int:
-        """
-        Remove da blacklist torrents que não existem mais na origem
+        Feito em SQL contra state_origem (atualizada no passo 1), sem carregar
+        a blacklist em memória nem montar listas de parâmetros.
         
-        Args:
-            origem_hashes: Set de hashes atualmente na origem
-            
         Returns:
             Número de itens removidos da blacklist
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.transaction() as cursor:
+            # Log antes de remover (precisa do nome)
+            cursor.execute('''
+                INSERT INTO operation_log (operation, torrent_hash, torrent_name, details, destination)
+                SELECT 'UNBLACKLIST', hash, name, 'Não existe mais na origem', destination
+                FROM blacklist_torrents
+                WHERE hash NOT IN (SELECT hash FROM state_origem)
+            ''')
+            
+            cursor.execute('''
+                DELETE FROM blacklist_torrents
+                WHERE hash NOT IN (SELECT hash FROM state_origem)
+            ''')
+            removed = cursor.rowcount
         
-        # Busca todos os hashes na blacklist
-        cursor.execute('SELECT hash, name FROM blacklist_torrents')
-        blacklist_items = cursor.fetchall()
+        return removed
+    
+    def add_cloned_batch(self, torrents: List[tuple], destination: str):
+        """Adiciona múltiplos torrents clonados no destino (BATCH)"""
+        if not torrents:
+            return
         
-        to_remove = []
-        for hash, name in blacklist_items:
-            if hash not in origem_hashes:
-                to_remove.append((hash, name))
+        with self.transaction() as cursor:
+            cursor.executemany('''
+                INSERT OR IGNORE INTO cloned_torrents (destination, hash, name, category, size_bytes)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [(destination, *t) for t in torrents])
+            
+            log_batch = [(
+                'CLONE',
+                t[0],
+                t[1],
+                f'Category: {t[2]}',
+                destination
+            ) for t in torrents]
+            
+            cursor.executemany('''
+                INSERT INTO operation_log (operation, torrent_hash, torrent_name, details, destination)
+                VALUES (?, ?, ?, ?, ?)
+            ''', log_batch)
+    
+    def remove_cloned_batch(self, torrents: List[tuple], destination: str):
+        """Remove múltiplos torrents do histórico do destino (BATCH)"""
+        if not torrents:
+            return
         
-        if to_remove:
-            # Remove da blacklist
-            hashes = [t[0] for t in to_remove]
-            placeholders = ','.join('?' * len(hashes))
-            cursor.execute(f'DELETE FROM blacklist_torrents WHERE hash IN ({placeholders})', hashes)
+        with self.transaction() as cursor:
+            # Em pedaços para não estourar o limite de variáveis do SQLite
+            for chunk in chunked([t[0] for t in torrents], SQLITE_MAX_PARAMS - 1):
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(
+                    f'DELETE FROM cloned_torrents WHERE destination = ? AND hash IN ({placeholders})',
+                    [destination, *chunk]
+                )
             
-            # Log
             log_batch = [(
-                'UNBLACKLIST',
+                'DELETE',
                 t[0],
                 t[1],
-                'Não existe mais na origem'
-            ) for t in to_remove]
+                destination
+            ) for t in torrents]
             
             cursor.executemany('''
-                INSERT INTO operation_log (operation, torrent_hash, torrent_name, details)
+                INSERT INTO operation_log (operation, torrent_hash, torrent_name, destination)
                 VALUES (?, ?, ?, ?)
             ''', log_batch)
-        
-        conn.commit()
-        conn.close()
-        
-        return len(to_remove)
     
-    def add_cloned_batch(self, torrents: List[tuple]):
-        """Adiciona múltiplos torrents clonados (BATCH)"""
+    def add_reconcile_batch(self, torrents: List[tuple], destination: str):
+        """
+        Registra torrents reconciliados no destino (BATCH)
+        
+        Args:
+            torrents: Tuplas (hash, nome, categoria atual, detalhes)
+        """
         if not torrents:
             return
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.executemany('''
-            INSERT OR IGNORE INTO cloned_torrents (hash, name, category, size_bytes)
-            VALUES (?, ?, ?, ?)
-        ''', torrents)
+        with self.transaction() as cursor:
+            cursor.executemany('''
+                UPDATE cloned_torrents SET category = ?
+                WHERE destination = ? AND hash = ?
+            ''', [(t[2], destination, t[0]) for t in torrents])
+            
+            cursor.executemany('''
+                INSERT INTO operation_log (operation, torrent_hash, torrent_name, details, destination)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [('RECONCILE', t[0], t[1], t[3], destination) for t in torrents])
+    
+    def load_categories(self, instance: str) -> Optional[dict]:
+        """
+        Categorias em cache de uma instância
         
-        log_batch = [(
-            'CLONE',
-            t[0],
-            t[1],
-            f'Category: {t[2]}'
-        ) for t in torrents]
+        Returns:
+            Dict com categories ({nome: savePath}), fingerprint,
+            source_fingerprint e fetched_at, ou None se não há cache
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute('''
+                SELECT categories, fingerprint, source_fingerprint, fetched_at
+                FROM category_state WHERE instance = ?
+            ''', (instance,))
+            row = cursor.fetchone()
         
-        cursor.executemany('''
-            INSERT INTO operation_log (operation, torrent_hash, torrent_name, details)
-            VALUES (?, ?, ?, ?)
-        ''', log_batch)
+        if not row:
+            return None
         
-        conn.commit()
-        conn.close()
+        return {
+            'categories': json.loads(row[0]),
+            'fingerprint': row[1],
+            'source_fingerprint': row[2],
+            'fetched_at': row[3]
+        }
     
-    def remove_cloned_batch(self, torrents: List[tuple]):
-        """Remove múltiplos torrents (BATCH)"""
-        if not torrents:
+    def save_categories(self, instance: str, state: dict):
+        """Grava o estado de categorias de uma instância (formato de load_categories)"""
+        with self.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO category_state (instance, categories, fingerprint, source_fingerprint, fetched_at)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(instance) DO UPDATE SET
+                    categories = excluded.categories,
+                    fingerprint = excluded.fingerprint,
+                    source_fingerprint = excluded.source_fingerprint,
+                    fetched_at = excluded.fetched_at
+            ''', (instance, json.dumps(state['categories'], sort_keys=True), state['fingerprint'],
+                  state.get('source_fingerprint'), state['fetched_at']))
+    
+    def invalidate_categories(self, instance: str):
+        """Descarta o cache de categorias (a próxima leitura vai à API)"""
+        with self.transaction() as cursor:
+            cursor.execute('DELETE FROM category_state WHERE instance = ?', (instance,))
+    
+    def enqueue_hashes(self, hashes: List[str]):
+        """Adiciona hashes à fila do hook (duplicados são ignorados)"""
+        if not hashes:
             return
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        hashes = [t[0] for t in torrents]
-        placeholders = ','.join('?' * len(hashes))
-        cursor.execute(f'DELETE FROM cloned_torrents WHERE hash IN ({placeholders})', hashes)
-        
-        log_batch = [(
-            'DELETE',
-            t[0],
-            t[1]
-        ) for t in torrents]
-        
-        cursor.executemany('''
-            INSERT INTO operation_log (operation, torrent_hash, torrent_name)
-            VALUES (?, ?, ?)
-        ''', log_batch)
+        with self.transaction() as cursor:
+            cursor.executemany('INSERT OR IGNORE INTO hook_queue (hash) VALUES (?)', [(h,) for h in hashes])
+    
+    def peek_hook_queue(self, limit: int) -> List[str]:
+        """
+        Próximos `limit` hashes da fila (mais antigos primeiro), sem removê-los
         
-        conn.commit()
-        conn.close()
+        Só saem da fila com ack_hook_queue depois que o lote for processado;
+        se o consumidor falhar no meio, o lote continua na fila.
+        """
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute('SELECT hash FROM hook_queue ORDER BY enqueued_at LIMIT ?', (limit,))
+            hashes = [row[0] for row in cursor.fetchall()]
+        return hashes
+    
+    def ack_hook_queue(self, hashes: List[str]):
+        """Remove da fila os hashes de um lote já processado"""
+        with self.transaction() as cursor:
+            cursor.executemany('DELETE FROM hook_queue WHERE hash = ?', [(h,) for h in hashes])
     
-    def get_stats(self) -> dict:
-        """Estatísticas rápidas"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def hook_queue_size(self) -> int:
+        """Número de hashes aguardando na fila do hook"""
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute('SELECT COUNT(*) FROM hook_queue')
+            count = cursor.fetchone()[0]
+        return count
+    
+    def compact_operation_log(self, retention_days: int, batch_size: int = 50000) -> int:
+        """
+        Compacta operation_log mais antigo que `retention_days`
         
-        cursor.execute('SELECT COUNT(*), SUM(size_bytes) FROM state_origem')
-        origem_count, origem_size = cursor.fetchone()
+        Os contadores horários antigos viram agregados diários em
+        operation_stats_daily e as linhas do log são removidas em lotes
+        (uma transação por lote, para não segurar o banco).
+        
+        Returns:
+            Número de linhas removidas do log
+        """
+        cutoff = f'-{int(retention_days)} days'
         
-        cursor.execute('SELECT COUNT(*), SUM(size_bytes) FROM cloned_torrents')
-        cloned_count, cloned_size = cursor.fetchone()
+        with self.transaction() as cursor:
+            cursor.execute('''
+                INSERT INTO operation_stats_daily (day, operation, count)
+                SELECT date(hour), operation, SUM(count)
+                FROM operation_stats_hourly
+                WHERE hour < datetime('now', ?)
+                GROUP BY 1, 2
+                ON CONFLICT(day, operation) DO UPDATE SET count = count + excluded.count
+            ''', (cutoff,))
+            cursor.execute("DELETE FROM operation_stats_hourly WHERE hour < datetime('now', ?)", (cutoff,))
+        
+        removed = 0
+        while True:
+            with self.transaction() as cursor:
+                cursor.execute('''
+                    DELETE FROM operation_log WHERE id IN (
+                        SELECT id FROM operation_log
+                        WHERE timestamp < datetime('now', ?)
+                        LIMIT ?
+                    )
+                ''', (cutoff, batch_size))
+                deleted = cursor.rowcount
+            
+            removed += deleted
+            if deleted < batch_size:
+                break
         
-        cursor.execute('SELECT COUNT(*) FROM blacklist_torrents')
-        blacklist_count = cursor.fetchone()[0]
+        return removed
+    
+    def get_stats(self, destination: Optional[str] = None) -> dict:
+        """
+        Estatísticas rápidas
         
-        cursor.execute('''
-            SELECT operation, COUNT(*) FROM operation_log 
-            WHERE timestamp > datetime('now', '-24 hours')
-            GROUP BY operation
-        ''')
-        ops_24h = dict(cursor.fetchall())
+        Args:
+            destination: Restringe histórico e blacklist a um destino (None = todos)
+        """
+        where = 'WHERE destination = ?' if destination else ''
+        params = (destination,) if destination else ()
         
-        conn.close()
+        with self._lock:
+            cursor = self.conn.cursor()
+            
+            cursor.execute('SELECT COUNT(*), SUM(size_bytes) FROM state_origem')
+            origem_count, origem_size = cursor.fetchone()
+            
+            cursor.execute(f'SELECT COUNT(*), SUM(size_bytes) FROM cloned_torrents {where}', params)
+            cloned_count, cloned_size = cursor.fetchone()
+            
+            cursor.execute(f'SELECT COUNT(*) FROM blacklist_torrents {where}', params)
+            blacklist_count = cursor.fetchone()[0]
+            
+            # Lê os contadores horários (no máximo 24 horas x operações), não o log
+            cursor.execute('''
+                SELECT operation, SUM(count) FROM operation_stats_hourly
+                WHERE hour > strftime('%Y-%m-%d %H:00:00', 'now', '-24 hours')
+                GROUP BY operation
+            ''')
+            ops_24h = dict(cursor.fetchall())
         
         return {
             'origem_count': origem_count or 0,
@@ -319,326 +850,2257 @@ class SyncDatabase:
 
 # ==================== FUNÇÕES ====================
 
-def log(msg: str, level: int = 1):
-    """Log com nível de verbosidade"""
-    if config.VERBOSE >= level:
-        print(msg)
+# IDs de correlação anexados a cada registro de log
+LOG_CONTEXT = {
+    'sync_id': contextvars.ContextVar('sync_id', default=None),
+    'destination': contextvars.ContextVar('destination', default=None),
+    'torrent': contextvars.ContextVar('torrent', default=None),
+}
+
+# Nível do log() (0=erro, 1=normal, 2=debug) -> nível do logging
+LOG_LEVELS = {0: logging.WARNING, 1: logging.INFO, 2: logging.DEBUG}
+
+_logger = logging.getLogger('qbit-clone')
+
+
+class LogContextFilter(logging.Filter):
+    """Copia os IDs de correlação da thread que gerou o registro"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        for name, var in LOG_CONTEXT.items():
+            setattr(record, name, var.get())
+        return True
 
 
-def log_error(msg: str):
-    """Log de erro em arquivo"""
+class JsonLinesFormatter(logging.Formatter):
+    """Um objeto JSON por linha: ts, level, msg e IDs de correlação presentes"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'msg': record.getMessage()
+        }
+        for name in LOG_CONTEXT:
+            value = getattr(record, name, None)
+            if value:
+                entry[name] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging():
+    """
+    Configura console + arquivo atrás de uma fila (escrita em thread própria)
+    
+    O console recebe as mensagens do log() já filtradas por VERBOSE. O arquivo
+    (LOG_FILE) fica aberto e recebe os log_error() em JSON lines (LOG_FORMAT =
+    'json') ou texto. Cron, hook e daemon escrevem no mesmo arquivo ao mesmo
+    tempo, então a rotação fica com o logrotate: o WatchedFileHandler reabre o
+    arquivo quando ele é movido.
+    """
+    _logger.setLevel(logging.DEBUG)
+    _logger.propagate = False
+    
+    # stdout fechado (pipe, terminal encerrado) não deve gerar tracebacks
+    logging.raiseExceptions = False
+    
+    console = logging.StreamHandler(sys.stdout)
+    console.setFormatter(logging.Formatter('%(message)s'))
+    console.addFilter(lambda record: not getattr(record, 'file_only', False))
+    handlers = [console]
+    
     try:
         Path(config.LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
-        with open(config.LOG_FILE, 'a') as f:
-            f.write(f"[{datetime.now()}] {msg}\n")
-    except:
+        file_handler = WatchedFileHandler(config.LOG_FILE, encoding='utf-8', delay=True)
+        file_handler.setLevel(logging.ERROR)
+        if getattr(config, 'LOG_FORMAT', 'json') == 'json':
+            file_handler.setFormatter(JsonLinesFormatter())
+        else:
+            file_handler.setFormatter(logging.Formatter('[%(asctime)s] %(message)s'))
+        handlers.append(file_handler)
+    except OSError:
         pass
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(LogContextFilter())
+    _logger.addHandler(queue_handler)
+    
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
 
 
-def build_url(host: str, port: int, use_https: bool) -> str:
-    """Monta URL"""
-    protocol = 'https' if use_https else 'http'
-    return f"{protocol}://{host}:{port}"
+def log(msg: str, level: int = 1, *args):
+    """
+    Log com nível de verbosidade
+    
+    `args` são formatados com % só se a mensagem for exibida, então chamadas
+    em laços custam apenas a comparação de nível com VERBOSE baixo.
+    """
+    if config.VERBOSE >= level:
+        _logger.log(LOG_LEVELS.get(level, logging.DEBUG), msg, *args)
+
+
+def log_error(msg: str, *args):
+    """Log de erro em arquivo (com IDs de correlação)"""
+    _logger.error(msg, *args, extra={'file_only': True})
+
+
+@contextmanager
+def log_context(**values):
+    """Define IDs de correlação (sync_id, destination, torrent) dentro do bloco"""
+    tokens = [(LOG_CONTEXT[name], LOG_CONTEXT[name].set(value)) for name, value in values.items()]
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def new_correlation_id() -> str:
+    return uuid.uuid4().hex[:12]
+
+
+def submit_in_context(pool: ThreadPoolExecutor, fn, *args):
+    """pool.submit preservando os IDs de correlação da thread atual"""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+setup_logging()
+
+
+def is_throttle_error(e: Exception) -> bool:
+    """True para erros que indicam instância sobrecarregada (403, 5xx, timeout/conexão)"""
+    if isinstance(e, (HTTP5XXError, Forbidden403Error)):
+        return True
+    return isinstance(e, APIConnectionError) and not isinstance(e, HTTPError)
+
+
+def is_connection_error(e: Exception) -> bool:
+    """True para falhas de conexão ou sessão (login, 403, timeout), que exigem reconectar"""
+    if isinstance(e, Forbidden403Error):
+        return True
+    return isinstance(e, APIConnectionError) and not isinstance(e, HTTPError)
+
+
+class RateController:
+    """
+    Token bucket com taxa ajustada por AIMD para uma instância
+    
+    Cada requisição consome um token. Enquanto as respostas chegam abaixo de
+    RATE_TARGET_LATENCY a taxa sobe ~RATE_INCREASE req/s a cada segundo de
+    tráfego; respostas lentas, 403, 5xx e timeouts cortam a taxa pela metade
+    (no máximo uma vez por janela de latência, para uma rajada de erros
+    simultâneos não derrubar a taxa direto ao mínimo). Chamadas registradas
+    com timed=False (listagens grandes) só contam pelos erros.
+    """
+    
+    def __init__(self, name: str, initial_rate: float, min_rate: float, max_rate: float,
+                 target_latency: float, increase: float):
+        self.name = name
+        self.min_rate = min_rate
+        self.max_rate = max(min_rate, max_rate)
+        self.rate = min(self.max_rate, max(min_rate, initial_rate))
+        self.target_latency = target_latency
+        self.increase = increase
+        self.requests = 0
+        self.throttled = 0
+        self._tokens = 1.0
+        self._updated = time.monotonic()
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, name: str, max_rate: Optional[float] = None) -> 'RateController':
+        return cls(
+            name,
+            initial_rate=getattr(config, 'RATE_LIMIT_INITIAL', 10),
+            min_rate=getattr(config, 'RATE_LIMIT_MIN', 1),
+            max_rate=max_rate or getattr(config, 'RATE_LIMIT_MAX', 50),
+            target_latency=getattr(config, 'RATE_TARGET_LATENCY', 2.0),
+            increase=getattr(config, 'RATE_INCREASE', 5.0)
+        )
+    
+    def acquire(self):
+        """Bloqueia até haver um token disponível (rajada máxima de 1s de taxa)"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                burst = max(1.0, self.rate)
+                self._tokens = min(burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+    
+    def record(self, latency: float, throttled: bool = False, timed: bool = True):
+        """
+        Ajusta a taxa a partir do resultado de uma requisição
+        
+        Args:
+            timed: False quando a latência depende do tamanho da resposta e
+                não da carga da WebUI; aí só o erro (throttled) reduz a taxa
+        """
+        with self._lock:
+            self.requests += 1
+            
+            if throttled or (timed and latency > self.target_latency):
+                self.throttled += 1
+                now = time.monotonic()
+                if now - self._last_decrease >= max(latency, self.target_latency):
+                    self.rate = max(self.min_rate, self.rate / 2)
+                    self._last_decrease = now
+            else:
+                self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+    
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'requests': self.requests,
+                'throttled': self.throttled
+            }
+
+
+class InstanceClient:
+    """
+    Envolve um Client limitando requisições simultâneas e a taxa da instância
+
+    Todas as chamadas de método passam pelo RateController e pelo semáforo da
+    instância, então vários workers podem compartilhar o mesmo client sem
+    sobrecarregar a WebUI. Latência e erros de cada chamada realimentam a taxa.
+    """
+
+    # Listagens cujo tempo cresce com o tamanho da biblioteca (dezenas de MB
+    # de JSON): a latência delas não indica WebUI sobrecarregada
+    UNTIMED_METHODS = frozenset({'torrents_info', 'sync_maindata'})
+
+    def __init__(self, client, name: str, max_concurrency: int, rate: Optional[RateController] = None):
+        self._client = client
+        self.name = name
+        self.rate = rate or RateController.from_config(name)
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+
+    def __getattr__(self, attr):
+        value = getattr(self._client, attr)
+        if not callable(value):
+            return value
+
+        def limited_call(*args, **kwargs):
+            self.rate.acquire()
+            with self._slots:
+                start = time.monotonic()
+                try:
+                    result = value(*args, **kwargs)
+                except Exception as e:
+                    throttled = is_throttle_error(e)
+                    self._record(attr, time.monotonic() - start, 'throttled' if throttled else 'error')
+                    raise
+                self._record(attr, time.monotonic() - start, 'ok')
+                return result
+
+        return limited_call
+
+    def _record(self, method: str, latency: float, result: str):
+        """Realimenta o controle de taxa e as métricas da chamada"""
+        self.rate.record(latency, result == 'throttled', method not in self.UNTIMED_METHODS)
+        METRICS.observe('api_request_duration_seconds', latency, instance=self.name, method=method)
+        METRICS.inc('api_requests_total', instance=self.name, method=method, result=result)
+        METRICS.set('rate_limit_requests_per_second', self.rate.rate, instance=self.name)
+
+
+# Estados tratados como download e erro ('unknown' conta como erro)
+DOWNLOADING_STATES = {
+    'downloading', 'metaDL', 'forcedMetaDL', 'allocating', 'checkingDL',
+    'pausedDL', 'stoppedDL', 'queuedDL', 'stalledDL', 'forcedDL'
+}
+ERRORED_STATES = {'error', 'missingFiles', 'unknown'}
+
+# Estados que o filtro do servidor não inclui e são buscados na listagem completa
+SERVER_FILTER_GAPS = {'errored': {'unknown'}}
+
+
+class TorrentRecord:
+    """
+    Registro compacto de torrent com só os campos usados pela sincronização
+    
+    Usa __slots__ (sem __dict__ por instância): com 100k+ torrents ocupa uma
+    fração de um TorrentDictionary, que traz dezenas de campos da API. Tem o
+    mesmo acesso por atributo, então substitui o torrent original em todo o
+    fluxo depois da leitura.
+    """
+    
+    DEFAULTS = (
+        ('name', ''), ('category', ''), ('size', 0), ('state', ''),
+        ('save_path', ''), ('tags', ''), ('auto_tmm', False),
+        ('ratio', 0.0), ('uploaded', 0), ('upspeed', 0),
+        ('num_complete', 0), ('num_incomplete', 0)
+    )
+    FIELDS = tuple(field for field, _ in DEFAULTS)
+    
+    __slots__ = ('hash',) + FIELDS
+    
+    def __init__(self, torrent_hash: str, data: Optional[dict] = None):
+        self.hash = torrent_hash
+        data = data or {}
+        for field, default in self.DEFAULTS:
+            setattr(self, field, data.get(field, default))
+    
+    @classmethod
+    def from_torrent(cls, torrent) -> 'TorrentRecord':
+        """Converte TorrentDictionary (ou dict da API) em registro compacto"""
+        if isinstance(torrent, cls):
+            return torrent
+        return cls(torrent['hash'], torrent)
+    
+    def watched(self, fields: tuple) -> tuple:
+        return tuple(getattr(self, field) for field in fields)
+
+
+class InstanceMirror:
+    """
+    Espelho incremental de uma instância via sync/maindata
+    
+    Mantém em memória o último rid e os campos usados pela sincronização.
+    Cada refresh baixa apenas o delta desde o rid anterior. O qBittorrent
+    guarda o rid por sessão da WebUI, então o espelho só vale enquanto o
+    client estiver logado (na prática, no daemon); um rid desconhecido (nova
+    sessão, reinício) recebe full_update e o espelho é substituído. Expõe
+    torrents_info() com a mesma interface do Client para ser usado no lugar
+    dele nas leituras.
+    """
+    
+    FIELDS = frozenset(TorrentRecord.FIELDS)
+    
+    # Campos cuja mudança exige nova sincronização (ratio/uploaded mudam o tempo
+    # todo); o estado só conta quando muda de filtro (ver _signature)
+    WATCH_FIELDS = ('category', 'tags', 'save_path')
+    
+    # Estados incluídos no filtro 'seeding' da WebUI
+    SEEDING_STATES = {'uploading', 'stalledUP', 'checkingUP', 'queuedUP', 'forcedUP'}
+    
+    # Filtros de estado suportados localmente (mesmos nomes da API)
+    FILTER_STATES = {
+        'seeding': SEEDING_STATES,
+        'downloading': DOWNLOADING_STATES,
+        'errored': ERRORED_STATES
+    }
+    
+    def __init__(self, client, instance: str):
+        self.client = client
+        self.instance = instance
+        self.rid, self.torrents = 0, {}
+    
+    def _signature(self, record: TorrentRecord) -> tuple:
+        """
+        WATCH_FIELDS + filtros de estado em que o torrent está
+        
+        uploading ↔ stalledUP ↔ forcedUP acontece o tempo todo e não muda
+        nada para a sincronização; só entrar ou sair de seeding, downloading
+        ou errored é relevante.
+        """
+        filters = tuple(name for name, states in self.FILTER_STATES.items() if record.state in states)
+        return record.watched(self.WATCH_FIELDS) + (filters,)
+    
+    def refresh(self) -> int:
+        """
+        Aplica o delta desde o último rid
+        
+        Returns:
+            Número de torrents novos, removidos, com WATCH_FIELDS alterados ou
+            que mudaram de filtro de estado
+        """
+        data = self.client.sync_maindata(rid=self.rid)
+        full_update = bool(data.get('full_update'))
+        previous = self.torrents
+        
+        if full_update:
+            self.torrents = {}
+        
+        relevant = 0
+        for torrent_hash, delta in (data.get('torrents') or {}).items():
+            current = previous.get(torrent_hash)
+            before = self._signature(current) if current else None
+            
+            if current is None:
+                current = TorrentRecord(torrent_hash)
+            self.torrents[torrent_hash] = current
+            
+            for k, v in delta.items():
+                if k in self.FIELDS:
+                    setattr(current, k, v)
+            
+            if before != self._signature(current):
+                relevant += 1
+        
+        removed = [h for h in (data.get('torrents_removed') or []) if self.torrents.pop(h, None) is not None]
+        if full_update:
+            removed.extend(h for h in previous if h not in self.torrents)
+        relevant += len(removed)
+        
+        self.rid = data.get('rid', self.rid)
+        
+        return relevant
+    
+    def torrents_info(self, status_filter: Optional[str] = None, category: Optional[str] = None,
+                      torrent_hashes=None, **kwargs) -> list:
+        """Equivalente a Client.torrents_info, lido do espelho após refresh"""
+        self.refresh()
+        
+        status_filter = status_filter or kwargs.get('filter')
+        states = self.FILTER_STATES.get(status_filter)
+        if isinstance(torrent_hashes, str):
+            torrent_hashes = torrent_hashes.split('|')
+        wanted = set(torrent_hashes) if torrent_hashes else None
+        
+        result = []
+        for torrent_hash, record in self.torrents.items():
+            if wanted is not None and torrent_hash not in wanted:
+                continue
+            if states is not None and record.state not in states:
+                continue
+            if category is not None and record.category != category:
+                continue
+            result.append(record)
+        
+        return result
+
+
+class InstanceReader:
+    """
+    Camada de leitura de uma instância durante um ciclo de sincronização
+    
+    A API não permite escolher campos, então o ganho vem de pedir menos
+    torrents: filtros de estado, categoria e lista de hashes vão para o
+    servidor (ou para o espelho incremental), e a listagem completa é buscada
+    no máximo uma vez por ciclo e reaproveitada pelos passos que só precisam
+    dos hashes. Tudo é devolvido como TorrentRecord.
+    """
+    
+    def __init__(self, view):
+        self.view = view
+        self._all = None
+        self._added = set()
+        self._removed = set()
+    
+    def track(self, added=(), removed=()):
+        """Registra hashes clonados/removidos no ciclo, depois da listagem completa"""
+        self._added.update(added)
+        self._removed.update(removed)
+    
+    def all(self) -> list:
+        """Todos os torrents da instância (uma busca por ciclo)"""
+        if self._all is None:
+            self._all = [TorrentRecord.from_torrent(t) for t in self.view.torrents_info()]
+        return self._all
+    
+    def hashes(self) -> set:
+        return {t.hash for t in self.all()}
+    
+    def select(self, status_filter: Optional[str] = None, categories: Optional[list] = None) -> list:
+        """
+        Torrents filtrados no servidor por estado e categorias (uma chamada por categoria)
+        
+        Estados que o filtro do servidor deixa de fora (SERVER_FILTER_GAPS,
+        ex.: 'unknown' em 'errored') são relidos por hash: candidatos são os
+        que estavam nesses estados na listagem do ciclo mais os clonados
+        depois dela (track), sem os já removidos. Assim o estado é o atual, não
+        o do início do ciclo.
+        """
+        if not categories:
+            result = [TorrentRecord.from_torrent(t) for t in self.view.torrents_info(status_filter=status_filter)]
+        else:
+            result = []
+            for category in categories:
+                result.extend(
+                    TorrentRecord.from_torrent(t)
+                    for t in self.view.torrents_info(status_filter=status_filter, category=category)
+                )
+        
+        # O espelho incremental filtra localmente com os conjuntos completos
+        gap = SERVER_FILTER_GAPS.get(status_filter)
+        if gap and not isinstance(self.view, InstanceMirror):
+            candidates = {t.hash for t in self.all() if t.state in gap} | self._added
+            candidates -= self._removed | {t.hash for t in result}
+            result.extend(
+                t for t in self.by_hashes(candidates)
+                if t.state in gap and (not categories or t.category in categories)
+            )
+        return result
+    
+    def by_hashes(self, hashes) -> list:
+        """Só os torrents dos hashes informados (em pedaços de HASH_CHUNK_SIZE)"""
+        result = []
+        for chunk in chunked(list(hashes), getattr(config, 'HASH_CHUNK_SIZE', 500)):
+            result.extend(TorrentRecord.from_torrent(t) for t in self.view.torrents_info(torrent_hashes=chunk))
+        return result
+
+
+def build_url(host: str, port: int, use_https: bool) -> str:
+    """Monta URL"""
+    protocol = 'https' if use_https else 'http'
+    return f"{protocol}://{host}:{port}"
+
+
+def http_adapter_args(max_concurrency: int, pool_size: Optional[int], retries: int) -> dict:
+    """
+    Argumentos do HTTPAdapter (requests) de uma instância
+    
+    O pool guarda uma conexão persistente (keep-alive) por requisição
+    simultânea permitida, então rajadas de workers reaproveitam conexões TLS
+    abertas em vez de abrir e descartar novas. Falhas de conexão e 500/502/503/504
+    são repetidas com backoff exponencial, inclusive em POST: a API v2 usa
+    POST para quase tudo (info, export, add, delete) e essas chamadas são
+    idempotentes (adicionar um hash existente ou remover um ausente não muda nada).
+    """
+    pool_size = pool_size or max(1, max_concurrency)
+    
+    return {
+        'pool_connections': 1,
+        'pool_maxsize': pool_size,
+        'max_retries': urllib3.util.Retry(
+            total=retries,
+            connect=retries,
+            read=1,
+            status_forcelist={500, 502, 503, 504},
+            allowed_methods=urllib3.util.Retry.DEFAULT_ALLOWED_METHODS | {'POST'},
+            backoff_factor=getattr(config, 'HTTP_RETRY_BACKOFF', 0.5),
+            raise_on_status=False
+        )
+    }
+
+
+def connection_stats(client) -> dict:
+    """
+    Conexões abertas x requisições feitas nos pools do urllib3 do client
+    
+    Returns:
+        Dict com 'connections', 'requests' e 'reused' (requisições que
+        aproveitaram uma conexão já aberta)
+    """
+    connections = 0
+    requests = 0
+    
+    session = getattr(client, '_http_session', None)
+    if session is not None:
+        for adapter in set(session.adapters.values()):
+            pools = getattr(adapter, 'poolmanager', None)
+            if pools is None:
+                continue
+            for key in pools.pools.keys():
+                pool = pools.pools.get(key)
+                if pool is not None:
+                    connections += pool.num_connections
+                    requests += pool.num_requests
+    
+    return {
+        'connections': connections,
+        'requests': requests,
+        'reused': max(0, requests - connections)
+    }
+
+
+def get_clients(exit_on_error: bool = True):
+    """
+    Conecta nas instâncias
+    
+    Um destino que falha no login fica de fora desta execução e os demais
+    seguem sincronizando; só falha na origem ou em todos os destinos é erro.
+    
+    Args:
+        exit_on_error: Se False, propaga a exceção em vez de encerrar (modo daemon)
+    
+    Returns:
+        Tupla (src, destinos), onde destinos é a lista de InstanceClient
+        conectados, na ordem de get_destination_configs()
+    """
+    log("🔌 Conectando...", 1)
+    
+    try:
+        src = Client(
+            host=build_url(config.SRC_HOST, config.SRC_PORT, config.SRC_USE_HTTPS),
+            username=config.SRC_USER,
+            password=config.SRC_PASS,
+            VERIFY_WEBUI_CERTIFICATE=config.SRC_VERIFY_SSL,
+            REQUESTS_ARGS={'timeout': config.REQUEST_TIMEOUT},
+            HTTPADAPTER_ARGS=http_adapter_args(
+                getattr(config, 'SRC_MAX_CONCURRENCY', 4),
+                getattr(config, 'SRC_HTTP_POOL_SIZE', None),
+                getattr(config, 'SRC_HTTP_RETRIES', 3)
+            )
+        )
+        src.auth_log_in()
+        log(f"✅ ORIGEM: {config.SRC_HOST}:{config.SRC_PORT} | v{src.app.version}", 1)
+        src = InstanceClient(src, 'origem', getattr(config, 'SRC_MAX_CONCURRENCY', 4),
+                             RateController.from_config('origem'))
+        
+        destinations = []
+        for d in get_destination_configs():
+            try:
+                dst = Client(
+                    host=build_url(d['host'], d['port'], d['use_https']),
+                    username=d['user'],
+                    password=d['pass'],
+                    VERIFY_WEBUI_CERTIFICATE=d['verify_ssl'],
+                    REQUESTS_ARGS={'timeout': config.REQUEST_TIMEOUT},
+                    HTTPADAPTER_ARGS=http_adapter_args(d['max_concurrency'], d['http_pool_size'], d['http_retries'])
+                )
+                dst.auth_log_in()
+                log(f"✅ DESTINO {d['name']}: {d['host']}:{d['port']} | v{dst.app.version}", 1)
+            except Exception as e:
+                log(f"⚠️  DESTINO {d['name']}: {e} (ignorado nesta execução)", 0)
+                log_error(f"Auth error ({d['name']}): {e}")
+                continue
+            destinations.append(InstanceClient(dst, d['name'], d['max_concurrency'],
+                                               RateController.from_config(d['name'], d['max_rate'])))
+        
+        if not destinations:
+            raise RuntimeError("nenhum destino disponível")
+        
+        return src, destinations
+        
+    except Exception as e:
+        log(f"❌ Erro de autenticação: {e}", 0)
+        log_error(f"Auth error: {e}")
+        if not exit_on_error:
+            raise
+        sys.exit(1)
+
+
+def open_database() -> SyncDatabase:
+    """Abre DATABASE_FILE; linhas de bancos antigos vão para o primeiro destino"""
+    return SyncDatabase(config.DATABASE_FILE, get_destination_configs()[0]['name'])
+
+
+def apply_filters(torrent) -> tuple[bool, str]:
+    """Aplica filtros configurados"""
+    if config.ONLY_SEEDING_STATE:
+        if torrent.state not in config.VALID_SEEDING_STATES:
+            return False, f"Estado {torrent.state} inválido"
+    
+    if config.FILTER_CATEGORIES:
+        if torrent.category not in config.FILTER_CATEGORIES:
+            return False, f"Categoria filtrada"
+    
+    if config.MIN_SIZE_GB:
+        if torrent.size / (1024**3) < config.MIN_SIZE_GB:
+            return False, "Tamanho menor que mínimo"
+    
+    if config.MIN_RATIO and torrent.ratio < config.MIN_RATIO:
+        return False, "Ratio menor que mínimo"
+    
+    if config.MIN_UPLOAD_GB:
+        if torrent.uploaded / (1024**3) < config.MIN_UPLOAD_GB:
+            return False, "Upload menor que mínimo"
+    
+    return True, "OK"
+
+
+def category_fingerprint(categories: dict) -> str:
+    """Impressão digital de {nome: savePath}, independente da ordem"""
+    return hashlib.sha1(json.dumps(categories, sort_keys=True).encode()).hexdigest()
+
+
+def read_categories(client, instance: str, db: Optional[SyncDatabase] = None,
+                    fresh_since: Optional[float] = None, required=()) -> tuple[dict, bool]:
+    """
+    Categorias de uma instância, do cache do banco ou da API
+    
+    O cache só é usado se foi lido da API a partir de `fresh_since` e tem
+    todas as categorias de `required` (uma categoria nova força a leitura).
+    Uma leitura da API com a mesma impressão digital mantém o
+    source_fingerprint (o destino continua sincronizado); se mudou, ele é
+    descartado.
+    
+    Returns:
+        Tupla (estado no formato de SyncDatabase.load_categories, veio do cache)
+    """
+    cached = db.load_categories(instance) if db is not None else None
+    if (cached and fresh_since is not None and cached['fetched_at'] >= fresh_since
+            and all(name in cached['categories'] for name in required)):
+        return cached, True
+    
+    categories = {name: info.get('savePath', '') or '' for name, info in client.torrents_categories().items()}
+    fingerprint = category_fingerprint(categories)
+    
+    state = {
+        'categories': categories,
+        'fingerprint': fingerprint,
+        'source_fingerprint': cached['source_fingerprint'] if cached and cached['fingerprint'] == fingerprint else None,
+        'fetched_at': time.time()
+    }
+    if db is not None:
+        db.save_categories(instance, state)
+    
+    return state, False
+
+
+def sync_categories(src, dst, db: Optional[SyncDatabase] = None, fresh_since: Optional[float] = None,
+                    required=()):
+    """
+    Sincroniza categorias (criações e mudanças de savePath)
+    
+    Com banco, as categorias de cada lado ficam em cache com uma impressão
+    digital: se o destino já foi sincronizado com a impressão atual da
+    origem (após FILTER_CATEGORIES), nada é comparado nem enviado, e com os
+    dois caches frescos (lidos a partir de `fresh_since`) não há nenhuma
+    chamada à API.
+    
+    Args:
+        db: Banco com o cache de categorias; None = sempre lê da API
+        fresh_since: Instante (time.time()) a partir do qual o cache vale;
+            None = sempre lê da API
+        required: Categorias que serão usadas (se faltam no cache da origem,
+            ela é lida da API)
+    """
+    log("\n📂 Sincronizando categorias...", 1)
+    
+    try:
+        src_state, src_cached = read_categories(src, 'origem', db, fresh_since, required)
+        dst_state, dst_cached = read_categories(dst, dst.name, db, fresh_since)
+        
+        wanted = {name: save_path for name, save_path in src_state['categories'].items()
+                  if not config.FILTER_CATEGORIES or name in config.FILTER_CATEGORIES}
+        wanted_fingerprint = category_fingerprint(wanted)
+        
+        if db is not None and dst_state['source_fingerprint'] == wanted_fingerprint:
+            source = "cache" if src_cached and dst_cached else "sem mudanças"
+            log(f"  ✅ Categorias OK ({source})", 1)
+            return
+        
+        dst_cats = dict(dst_state['categories'])
+        created = edited = 0
+        for name, save_path in wanted.items():
+            if name not in dst_cats:
+                dst.torrents_create_category(name=name, save_path=save_path)
+                log(f"  ➕ {name}", 1)
+                created += 1
+            elif dst_cats[name] != save_path:
+                dst.torrents_edit_category(name=name, save_path=save_path)
+                log(f"  ✏️  {name}: {dst_cats[name] or '-'} → {save_path or '-'}", 1)
+                edited += 1
+            else:
+                continue
+            
+            dst_cats[name] = save_path
+        
+        if db is not None:
+            db.save_categories(dst.name, {
+                'categories': dst_cats,
+                'fingerprint': category_fingerprint(dst_cats),
+                'source_fingerprint': wanted_fingerprint,
+                'fetched_at': dst_state['fetched_at']
+            })
+        
+        if created or edited:
+            log(f"  ✅ {created} categorias criadas | {edited} atualizadas", 1)
+        else:
+            log("  ✅ Categorias OK", 1)
+    
+    except Exception as e:
+        log(f"  ⚠️  Erro: {e}", 0)
+        if db is not None:
+            # Estado do destino incerto: a próxima sincronização relê da API
+            db.invalidate_categories(dst.name)
+
+
+def category_cache_since() -> Optional[float]:
+    """Início da validade do cache de categorias no daemon/hook (CATEGORY_CACHE_TTL)"""
+    ttl = getattr(config, 'CATEGORY_CACHE_TTL', 600)
+    return time.time() - ttl if ttl else None
+
+
+def chunked(items: list, size: int):
+    """Divide lista em pedaços de no máximo `size` itens"""
+    size = max(1, size)
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class ConfirmationTracker:
+    """
+    Confirma em lote adições e remoções pendentes no destino
+
+    As operações são registradas como pendentes e verificadas juntas com
+    uma consulta torrents_info multi-hash (em pedaços de HASH_CHUNK_SIZE).
+    O intervalo entre consultas é adaptativo: encurta quando há progresso e
+    cresce (até CONFIRM_MAX_DELAY) quando nada foi resolvido. Cada operação
+    expira após CONFIRM_TIMEOUT segundos sem confirmação.
+    """
+    
+    ADD = 'add'
+    DELETE = 'delete'
+    
+    def __init__(self, client):
+        self.client = client
+        self.initial_delay = getattr(config, 'CONFIRM_INITIAL_DELAY', 0.25)
+        self.max_delay = getattr(config, 'CONFIRM_MAX_DELAY', 2.0)
+        self.timeout = getattr(config, 'CONFIRM_TIMEOUT', 10)
+        self.chunk_size = getattr(config, 'HASH_CHUNK_SIZE', 500)
+        
+        self._pending = {}  # hash -> (tipo, payload, deadline)
+        self._lock = threading.Lock()
+        self._delay = self.initial_delay
+        self._next_poll = 0.0
+    
+    def expect_added(self, torrent_hash: str, payload=None):
+        """Registra hash que deve aparecer no destino"""
+        self._expect(self.ADD, torrent_hash, payload)
+    
+    def expect_removed(self, torrent_hash: str, payload=None):
+        """Registra hash que deve sumir do destino"""
+        self._expect(self.DELETE, torrent_hash, payload)
+    
+    def _expect(self, kind: str, torrent_hash: str, payload):
+        now = time.monotonic()
+        with self._lock:
+            if not self._pending:
+                self._delay = self.initial_delay
+                self._next_poll = now + self._delay
+            self._pending[torrent_hash] = (kind, payload, now + self.timeout)
+    
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+    
+    def time_to_next_poll(self) -> Optional[float]:
+        """Segundos até a próxima consulta (None se não há pendências)"""
+        with self._lock:
+            if not self._pending:
+                return None
+            return max(0.0, self._next_poll - time.monotonic())
+    
+    def poll(self) -> tuple[list, list]:
+        """
+        Executa uma rodada de verificação
+        
+        Returns:
+            Tupla (confirmados, expirados), listas de (hash, payload)
+        """
+        with self._lock:
+            snapshot = dict(self._pending)
+        
+        if not snapshot:
+            return [], []
+        
+        present = set()
+        try:
+            for chunk in chunked(list(snapshot), self.chunk_size):
+                present.update(t.hash for t in self.client.torrents_info(torrent_hashes=chunk))
+        except Exception as e:
+            log_error(f"Confirmation poll failed ({len(snapshot)} hashes): {e}")
+            present = None
+        
+        now = time.monotonic()
+        confirmed = []
+        expired = []
+        
+        with self._lock:
+            for torrent_hash, (kind, payload, deadline) in snapshot.items():
+                if present is not None:
+                    exists = torrent_hash in present
+                    if exists == (kind == self.ADD):
+                        confirmed.append((torrent_hash, payload))
+                        self._pending.pop(torrent_hash, None)
+                        continue
+                
+                if now >= deadline:
+                    expired.append((torrent_hash, payload))
+                    self._pending.pop(torrent_hash, None)
+            
+            if confirmed:
+                self._delay = max(self.initial_delay, self._delay / 2)
+            else:
+                self._delay = min(self.max_delay, self._delay * 2)
+            self._next_poll = now + self._delay
+        
+        return confirmed, expired
+    
+    def poll_if_due(self) -> tuple[list, list]:
+        """Consulta apenas se o intervalo atual já passou"""
+        if self.time_to_next_poll() == 0.0:
+            return self.poll()
+        return [], []
+    
+    def wait(self) -> tuple[list, list]:
+        """Consulta até resolver (ou expirar) todas as pendências"""
+        confirmed = []
+        expired = []
+        
+        while True:
+            delay = self.time_to_next_poll()
+            if delay is None:
+                break
+            time.sleep(delay)
+            
+            c, e = self.poll()
+            confirmed.extend(c)
+            expired.extend(e)
+        
+        return confirmed, expired
+
+
+class TorrentFileCache:
+    """
+    Cache em disco dos .torrent exportados, endereçado pelo infohash
+    
+    Arquivos ficam em `<cache_dir>/<2 primeiros chars>/<hash>.torrent`. O mtime
+    é atualizado a cada leitura e, quando o total passa de `max_bytes`, os menos
+    usados são removidos até 90% do limite (LRU por tamanho).
+    """
+    
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._total = sum(f.stat().st_size for f in self.cache_dir.glob('*/*.torrent'))
+    
+    def _path(self, torrent_hash: str) -> Path:
+        return self.cache_dir / torrent_hash[:2] / f"{torrent_hash}.torrent"
+    
+    def get(self, torrent_hash: str) -> Optional[bytes]:
+        """Retorna o .torrent em cache (None se não existir)"""
+        path = self._path(torrent_hash)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            data = None
+        
+        with self._lock:
+            if data:
+                self.hits += 1
+            else:
+                self.misses += 1
+        METRICS.inc('torrent_cache_total', result='hit' if data else 'miss')
+        
+        return data or None
+    
+    def put(self, torrent_hash: str, data: bytes) -> bool:
+        """
+        Grava o .torrent (escrita atômica) e aplica o limite de tamanho
+        
+        Returns:
+            True se o arquivo foi gravado
+        """
+        path = self._path(torrent_hash)
+        try:
+            path.parent.mkdir(exist_ok=True)
+            # PID + thread: cron e consumidor da fila podem gravar o mesmo hash ao mesmo tempo
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(data)
+            try:
+                replaced = path.stat().st_size
+            except OSError:
+                replaced = 0
+            os.replace(tmp, path)
+        except OSError as e:
+            log_error(f"Torrent cache write failed {torrent_hash}: {e}")
+            return False
+        
+        with self._lock:
+            self._total += len(data) - replaced
+            if self._total > self.max_bytes:
+                self._evict()
+        return True
+    
+    def _evict(self):
+        """Remove os arquivos menos usados até 90% do limite (chamado com lock)"""
+        entries = []
+        for f in self.cache_dir.glob('*/*.torrent'):
+            try:
+                st = f.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, f))
+        
+        self._total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * 0.9
+        
+        for _, size, f in sorted(entries):
+            if self._total <= target:
+                break
+            try:
+                f.unlink()
+                self._total -= size
+            except OSError:
+                pass
+
+
+_torrent_cache = None
+_torrent_cache_lock = threading.Lock()
+
+
+def get_torrent_cache() -> Optional[TorrentFileCache]:
+    """Cache de .torrent compartilhado pelo processo (None se desativado)"""
+    global _torrent_cache
+    
+    max_mb = getattr(config, 'TORRENT_CACHE_MAX_MB', 1024)
+    if not max_mb:
+        return None
+    
+    with _torrent_cache_lock:
+        if _torrent_cache is None:
+            cache_dir = getattr(config, 'TORRENT_CACHE_DIR', None) or \
+                str(Path(config.DATABASE_FILE).parent / 'torrents')
+            try:
+                _torrent_cache = TorrentFileCache(cache_dir, max_mb * 1024 * 1024)
+            except OSError as e:
+                log_error(f"Torrent cache disabled ({cache_dir}): {e}")
+                return None
+        return _torrent_cache
+
+
+class TorrentExporter:
+    """
+    Exporta cada .torrent da origem uma única vez e compartilha entre destinos
+    
+    `demand` informa quantos destinos vão pedir cada hash. Pedidos simultâneos
+    do mesmo hash esperam a primeira exportação em vez de repetir a chamada.
+    Com cache em disco, hashes já exportados antes não chamam a origem e o
+    conteúdo não fica em memória: os demais destinos releem o arquivo (e
+    exportam de novo se ele foi removido pelo limite do cache). Sem cache, o
+    conteúdo fica em memória só até o último destino buscá-lo.
+    """
+    
+    def __init__(self, src, demand: Optional[dict] = None, cache: Optional[TorrentFileCache] = None):
+        self.src = src
+        self.cache = cache
+        self._demand = dict(demand or {})
+        self._entries = {}  # hash -> [evento, conteúdo (None se está no disco), está no disco]
+        self._lock = threading.Lock()
+    
+    def _load(self, torrent_hash: str) -> tuple[Optional[bytes], bool]:
+        """
+        Lê do cache em disco ou exporta da origem (e grava no cache)
+        
+        Returns:
+            Tupla (conteúdo, está no cache em disco)
+        """
+        if self.cache is not None:
+            data = self.cache.get(torrent_hash)
+            if data:
+                return data, True
+        
+        data = self.src.torrents_export(torrent_hash=torrent_hash)
+        
+        stored = bool(data) and self.cache is not None and self.cache.put(torrent_hash, data)
+        return data, stored
+    
+    def get(self, torrent_hash: str) -> Optional[bytes]:
+        """Retorna o .torrent exportado (None se a exportação falhou)"""
+        with self._lock:
+            entry = self._entries.get(torrent_hash)
+            owner = entry is None
+            if owner:
+                entry = self._entries[torrent_hash] = [threading.Event(), None, False]
+        
+        if owner:
+            data = None
+            try:
+                data, entry[2] = self._load(torrent_hash)
+                if not entry[2]:
+                    entry[1] = data
+            finally:
+                entry[0].set()
+        else:
+            entry[0].wait()
+            data = entry[1]
+            if entry[2]:
+                data = self._load(torrent_hash)[0]
+        
+        with self._lock:
+            remaining = self._demand.get(torrent_hash, 1) - 1
+            self._demand[torrent_hash] = remaining
+            if remaining <= 0:
+                self._entries.pop(torrent_hash, None)
+                self._demand.pop(torrent_hash, None)
+        
+        return data
+
+
+def clone_group_key(torrent) -> tuple:
+    """Opções do torrents_add que precisam coincidir para enviar torrents juntos"""
+    return (torrent.save_path, torrent.category or '', torrent.tags or '', bool(torrent.auto_tmm))
+
+
+# Pesos padrão da fila de clonagem (CLONE_PRIORITY_WEIGHTS)
+DEFAULT_CLONE_PRIORITY_WEIGHTS = {
+    'upspeed': 1.0,
+    'num_incomplete': 1.0,
+    'num_complete': -0.25,
+    'ratio': 0.5,
+    'uploaded': 0.25,
+    'size': 0.0,
+}
+
+
+def clone_priority(torrent, weights: dict) -> float:
+    """
+    Pontuação de um torrent na fila de clonagem (maior = clona antes)
+    
+    Soma de peso * log(1 + valor) dos campos informados pela origem; o log
+    evita que um único torrent com upload ou tamanho enorme domine a ordem.
+    """
+    return sum(
+        weight * math.log1p(max(0, getattr(torrent, field, 0) or 0))
+        for field, weight in weights.items()
+    )
+
+
+def prioritize_clones(torrents: list) -> list:
+    """
+    Ordena a fila de clonagem por clone_priority (CLONE_PRIORITY_WEIGHTS)
+    
+    Torrents com swarm ativo (upload, leechers) começam a semear no destino
+    nos primeiros minutos de um backfill longo; os demais entram depois,
+    dentro do limite de taxa. Empates mantêm a ordem da API. Sem pesos
+    (None ou {}) a ordem da API é mantida.
+    """
+    weights = getattr(config, 'CLONE_PRIORITY_WEIGHTS', DEFAULT_CLONE_PRIORITY_WEIGHTS)
+    if not weights or len(torrents) < 2:
+        return list(torrents)
+    
+    unknown = set(weights) - set(TorrentRecord.FIELDS)
+    if unknown:
+        log_error(f"CLONE_PRIORITY_WEIGHTS: unknown fields ignored: {', '.join(sorted(unknown))}")
+        weights = {k: v for k, v in weights.items() if k not in unknown}
+    
+    scored = sorted(((clone_priority(t, weights), i, t) for i, t in enumerate(torrents)),
+                    key=lambda x: (-x[0], x[1]))
+    
+    best = scored[0][2]
+    log("  🏁 Prioridade: %s... (pontuação %.1f) primeiro", 2, best.name[:45], scored[0][0])
+    
+    return [t for _, _, t in scored]
+
+
+def submit_clone_batch(dst, torrents: list, files: dict) -> bool:
+    """
+    Adiciona vários .torrent no destino em um único torrents_add (sem confirmar)
+    
+    Args:
+        torrents: Torrents do lote, todos com a mesma clone_group_key
+        files: hash -> conteúdo do .torrent exportado
+    
+    Returns:
+        True se a WebUI aceitou o lote ("Ok." = ao menos um adicionado; cada
+        hash ainda é confirmado pelo ConfirmationTracker)
+    """
+    first = torrents[0]
+    try:
+        result = dst.torrents_add(
+            torrent_files={f"{h}.torrent": data for h, data in files.items()},
+            save_path=first.save_path,
+            category=first.category,
+            tags=first.tags,
+            is_skip_checking=config.SKIP_CHECKING,
+            is_paused=config.START_PAUSED,
+            use_auto_torrent_management=first.auto_tmm
+        )
+        
+        if result != "Ok.":
+            log("     ⚠️  API retornou: %s (%d torrents)", 2, result, len(files))
+            return False
+        
+        return True
+        
+    except Exception as e:
+        log_error(f"Clone error ({len(files)} torrents, first {first.hash}): {e}")
+        return False
+
+
+def enable_force_upload(dst, hashes: list):
+    """Ativa force upload em lote nos hashes confirmados"""
+    if not config.FORCE_UPLOAD or not hashes:
+        return
+    
+    for chunk in chunked(hashes, getattr(config, 'HASH_CHUNK_SIZE', 500)):
+        try:
+            dst.torrents_set_force_start(torrent_hashes=chunk, enable=True)
+            log(f"     ⚡ Force upload ativado ({len(chunk)})", 2)
+        except Exception as e:
+            log_error(f"Force upload failed ({len(chunk)} hashes): {e}")
+
+
+def clone_torrents_parallel(src, dst, torrents: list, db: SyncDatabase,
+                            exporter: Optional[TorrentExporter] = None,
+                            stop: Optional[threading.Event] = None) -> tuple[list, int]:
+    """
+    Clona torrents em paralelo com pool limitado de workers
+
+    A fila segue prioritize_clones (maior pontuação primeiro) e só mantém
+    uma janela pequena de exportações em andamento, então os primeiros
+    torrents chegam ao destino logo no início. Os workers exportam cada
+    .torrent; os exportados são agrupados por clone_group_key e enviados em
+    torrents_add com vários arquivos (até ADD_BATCH_SIZE por requisição e
+    ADD_BATCH_MAX_MB no corpo). Um grupo é enviado quando enche, quando
+    espera ADD_BATCH_MAX_WAIT segundos ou quando não há mais exportações. A
+    confirmação é feita em lote pelo ConfirmationTracker enquanto os workers
+    continuam, e o force upload dos confirmados sai em uma chamada por
+    HASH_CHUNK_SIZE hashes (ou após ADD_BATCH_MAX_WAIT). O limite real de
+    requisições por instância fica a cargo do InstanceClient. Os sucessos
+    são gravados no banco (histórico do destino) em lotes de DB_BATCH_SIZE.
+    
+    Args:
+        exporter: TorrentExporter compartilhado entre destinos (opcional)
+        stop: Evento de encerramento (daemon); quando setado nenhuma nova
+            exportação começa, os já exportados são enviados e os envios em
+            andamento são confirmados e gravados
+
+    Returns:
+        Tupla (hashes clonados, falhas)
+    """
+    workers = max(1, getattr(config, 'CLONE_WORKERS', 4))
+    batch_size = max(1, getattr(config, 'DB_BATCH_SIZE', 100))
+    add_batch_size = max(1, getattr(config, 'ADD_BATCH_SIZE', 50))
+    add_batch_bytes = getattr(config, 'ADD_BATCH_MAX_MB', 20) * 1024 * 1024
+    force_chunk_size = getattr(config, 'HASH_CHUNK_SIZE', 500)
+    max_wait = getattr(config, 'ADD_BATCH_MAX_WAIT', 5)
+    tracker = ConfirmationTracker(dst)
+    
+    if exporter is None:
+        exporter = TorrentExporter(src, cache=get_torrent_cache())
+    
+    def export(t):
+        LOG_CONTEXT['torrent'].set(t.hash)
+        try:
+            return exporter.get(t.hash)
+        except Exception as e:
+            log_error(f"Export error {t.hash}: {e}")
+            return None
+    
+    success_batch = []
+    force_pending = []
+    force_since = 0.0
+    cloned = []
+    failed = 0
+    
+    def resolve(confirmed: list, expired: list):
+        nonlocal failed, success_batch, force_pending, force_since
+        
+        for torrent_hash, _ in expired:
+            log_error(f"Clone unconfirmed: {torrent_hash}")
+        failed += len(expired)
+        
+        if confirmed and config.FORCE_UPLOAD:
+            if not force_pending:
+                force_since = time.monotonic()
+            force_pending.extend(h for h, _ in confirmed)
+        if confirmed:
+            success_batch.extend((t.hash, t.name, t.category or '', t.size) for _, t in confirmed)
+        
+        if force_pending and (len(force_pending) >= force_chunk_size or
+                              time.monotonic() - force_since >= max_wait):
+            enable_force_upload(dst, force_pending)
+            force_pending = []
+        
+        if len(success_batch) >= batch_size:
+            db.add_cloned_batch(success_batch, dst.name)
+            cloned.extend(h for h, _, _, _ in success_batch)
+            success_batch = []
+    
+    # Exportados aguardando envio: chave -> [torrents, {hash: conteúdo}, bytes, criado em]
+    groups = {}
+    buffered = 0
+    futures = {}
+    
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='clone')
+    
+    def flush(key):
+        nonlocal buffered
+        group, files, size, _ = groups.pop(key)
+        buffered -= size
+        future = submit_in_context(pool, submit_clone_batch, dst, group, files)
+        futures[future] = ('add', group)
+        return future
+    
+    def next_deadline() -> Optional[float]:
+        """Segundos até o próximo poll ou até um lote atingir ADD_BATCH_MAX_WAIT"""
+        timeouts = [tracker.time_to_next_poll()]
+        if groups:
+            oldest = min(g[3] for g in groups.values())
+            timeouts.append(oldest + max_wait - time.monotonic())
+        if force_pending:
+            timeouts.append(force_since + max_wait - time.monotonic())
+        timeouts = [t for t in timeouts if t is not None]
+        return max(0.0, min(timeouts)) if timeouts else None
+    
+    try:
+        # Janela de exportações em andamento: os lotes de adição entram na
+        # fila do pool logo atrás delas, em vez de esperar a fila inteira
+        queue_iter = iter(prioritize_clones(torrents))
+        window = workers * 2
+        not_done = set()
+        exporting = 0
+        processed = 0
+        
+        def submit_exports():
+            nonlocal exporting
+            while exporting < window and not (stop is not None and stop.is_set()):
+                t = next(queue_iter, None)
+                if t is None:
+                    return
+                future = submit_in_context(pool, export, t)
+                futures[future] = ('export', t)
+                not_done.add(future)
+                exporting += 1
+        
+        submit_exports()
+        
+        while not_done:
+            done, not_done = wait(not_done, timeout=next_deadline(), return_when=FIRST_COMPLETED)
+            
+            for future in done:
+                kind, job = futures.pop(future)
+                
+                if kind == 'add':
+                    if future.result():
+                        for t in job:
+                            tracker.expect_added(t.hash, t)
+                    else:
+                        failed += len(job)
+                    processed += len(job)
+                    log(f"  [{processed}/{len(torrents)}] Processando...", 1)
+                    continue
+                
+                exporting -= 1
+                data = future.result()
+                if not data:
+                    log(f"     ⚠️  Falha ao exportar .torrent", 2)
+                    failed += 1
+                    processed += 1
+                    continue
+                
+                key = clone_group_key(job)
+                group = groups.get(key)
+                if group and group[2] + len(data) > add_batch_bytes:
+                    not_done.add(flush(key))
+                    group = None
+                if group is None:
+                    group = groups[key] = [[], {}, 0, time.monotonic()]
+                
+                group[0].append(job)
+                group[1][job.hash] = data
+                group[2] += len(data)
+                buffered += len(data)
+                
+                if len(group[0]) >= add_batch_size:
+                    not_done.add(flush(key))
+            
+            submit_exports()
+            
+            # Muitos grupos pequenos: limita os .torrent retidos em memória
+            while buffered > add_batch_bytes * workers:
+                not_done.add(flush(max(groups, key=lambda k: groups[k][2])))
+            
+            # Lotes que esperaram ADD_BATCH_MAX_WAIT saem incompletos; sem
+            # exportações pendentes, nenhum grupo vai crescer mais
+            now = time.monotonic()
+            for key in list(groups):
+                if exporting == 0 or now - groups[key][3] >= max_wait:
+                    not_done.add(flush(key))
+            
+            resolve(*tracker.poll_if_due())
+        
+        with METRICS.timer('phase_duration_seconds', phase='confirm_wait', destination=dst.name):
+            resolve(*tracker.wait())
+        enable_force_upload(dst, force_pending)
+        
+        if processed < len(torrents):
+            log(f"  ⏹️  Interrompido: {len(torrents) - processed} torrents ficam para o próximo ciclo", 1)
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if success_batch:
+            db.add_cloned_batch(success_batch, dst.name)
+            cloned.extend(h for h, _, _, _ in success_batch)
+        
+        METRICS.inc('operations_total', len(cloned), operation='clone', destination=dst.name, result='success')
+        METRICS.inc('operations_total', failed, operation='clone', destination=dst.name, result='failure')
+    
+    return cloned, failed
+
+
+# Estados em que o qBittorrent ainda está processando um torrent recém-adicionado
+TRANSITIONAL_STATES = {
+    'checkingUP', 'checkingDL', 'checkingResumeData',
+    'metaDL', 'forcedMetaDL', 'allocating', 'moving'
+}
+
+
+def wait_for_settle(dst, hashes: list) -> int:
+    """
+    Aguarda torrents recém-clonados saírem dos estados transitórios
+    
+    Consulta só os hashes informados, em lote, com o mesmo backoff adaptativo
+    da confirmação (CONFIRM_INITIAL_DELAY até CONFIRM_MAX_DELAY), até todos
+    assentarem ou SETTLE_TIMEOUT expirar. Hashes que sumiram do destino
+    contam como assentados.
+    
+    Returns:
+        Quantos ainda estavam em estado transitório no prazo
+    """
+    initial_delay = getattr(config, 'CONFIRM_INITIAL_DELAY', 0.25)
+    max_delay = getattr(config, 'CONFIRM_MAX_DELAY', 2.0)
+    chunk_size = getattr(config, 'HASH_CHUNK_SIZE', 500)
+    deadline = time.monotonic() + getattr(config, 'SETTLE_TIMEOUT', 60)
+    
+    pending = set(hashes)
+    delay = initial_delay
+    
+    while pending:
+        unsettled = set()
+        for chunk in chunked(list(pending), chunk_size):
+            try:
+                torrents = dst.torrents_info(torrent_hashes=chunk)
+            except Exception as e:
+                log_error(f"Settle check failed ({len(chunk)} hashes): {e}")
+                unsettled.update(chunk)
+                continue
+            unsettled.update(t.hash for t in torrents if t.state in TRANSITIONAL_STATES)
+        
+        if len(unsettled) < len(pending):
+            delay = max(initial_delay, delay / 2)
+        else:
+            delay = min(max_delay, delay * 2)
+        pending = unsettled
+        
+        remaining = deadline - time.monotonic()
+        if not pending or remaining <= 0:
+            break
+        
+        log(f"  ⏳ {len(pending)} em estado transitório...", 2)
+        time.sleep(min(delay, remaining))
+    
+    return len(pending)
+
+
+def delete_torrents_bulk(dst, items: List[tuple]) -> tuple[list, list]:
+    """
+    Remove torrents do destino em lote e confirma a remoção
+    
+    Agrupa os hashes pelo modo delete_files e envia um torrents_delete
+    multi-hash por pedaço de HASH_CHUNK_SIZE. A confirmação também é feita
+    em lote pelo ConfirmationTracker.
+    
+    Args:
+        items: Lista de tuplas (hash, delete_files, payload)
+    
+    Returns:
+        Tupla (confirmados, falhas), listas de payloads
+    """
+    chunk_size = getattr(config, 'HASH_CHUNK_SIZE', 500)
+    tracker = ConfirmationTracker(dst)
+    failed = []
+    
+    groups = {}
+    for torrent_hash, delete_files, payload in items:
+        groups.setdefault(bool(delete_files), []).append((torrent_hash, payload))
+    
+    for delete_files, group in groups.items():
+        for chunk in chunked(group, chunk_size):
+            try:
+                dst.torrents_delete(delete_files=delete_files, torrent_hashes=[h for h, _ in chunk])
+            except Exception as e:
+                log_error(f"Bulk delete error ({len(chunk)} hashes): {e}")
+                failed.extend(payload for _, payload in chunk)
+                continue
+            
+            for torrent_hash, payload in chunk:
+                tracker.expect_removed(torrent_hash, payload)
+    
+    confirmed, expired = tracker.wait()
+    
+    for torrent_hash, _ in expired:
+        log_error(f"Delete unconfirmed: {torrent_hash}")
+    failed.extend(payload for _, payload in expired)
+    
+    return [payload for _, payload in confirmed], failed
+
+
+def remove_unwanted_torrents(dst, db: SyncDatabase, reader: Optional[InstanceReader] = None) -> dict:
+    """
+    Remove torrents indesejados e adiciona à blacklist
+    
+    Busca só os torrents em download e com erro (filtros do servidor), em vez
+    da lista completa do destino.
+    
+    Args:
+        reader: Leitura do destino (InstanceReader); padrão lê direto do client
+    """
+    log("\n🚫 Removendo torrents indesejados...", 1)
+    
+    try:
+        reader = reader or InstanceReader(dst)
+        downloading = reader.select('downloading')
+        errored = reader.select('errored')
+        
+        total_unwanted = len(downloading) + len(errored)
+        
+        if total_unwanted == 0:
+            log(f"  ✅ Nenhum torrent indesejado", 1)
+            return {'downloading': 0, 'error': 0, 'total': 0}
+        
+        log(f"  🚫 {total_unwanted} torrents indesejados detectados:", 1)
+        if downloading:
+            log(f"     📥 {len(downloading)} em download", 1)
+        if errored:
+            log(f"     ⚠️  {len(errored)} com erro", 1)
+        
+        items = []
+        for t in downloading + errored:
+            reason = "download" if t.state in DOWNLOADING_STATES else f"erro:{t.state}"
+            log("     • %s... (%s)", 2, t.name[:45], reason)
+            items.append((t.hash, False, (t, reason)))
+        
+        confirmed, failed_items = delete_torrents_bulk(dst, items)
+        
+        removed_batch = [(t.hash, t.name) for t, _ in confirmed]
+        blacklist_batch = [(t.hash, t.name, reason) for t, reason in confirmed]
+        failed = len(failed_items)
+        
+        for t, reason in failed_items:
+            log(f"     ❌ Falha ao remover {t.name[:45]}", 0)
+        
+        # Atualiza banco + blacklist numa única transação
+        with db.transaction():
+            if removed_batch:
+                log(f"\n  💾 Atualizando banco ({len(removed_batch)} remoções)...", 1)
+                db.remove_cloned_batch(removed_batch, dst.name)
+                log(f"  ✅ Banco atualizado", 1)
+            
+            if blacklist_batch:
+                log(f"  🚷 Adicionando {len(blacklist_batch)} à blacklist...", 1)
+                db.add_to_blacklist_batch(blacklist_batch, dst.name)
+                log(f"  ✅ Blacklist atualizada", 1)
+        
+        log(f"\n  📊 Removidos: {len(removed_batch)} | Falhas: {failed}", 1)
+        
+        METRICS.inc('operations_total', len(removed_batch), operation='remove_unwanted', destination=dst.name, result='success')
+        METRICS.inc('operations_total', failed, operation='remove_unwanted', destination=dst.name, result='failure')
+        
+        return {
+            'downloading': len(downloading),
+            'error': len(errored),
+            'total': len(removed_batch)
+        }
+        
+    except Exception as e:
+        log(f"  ⚠️  Erro ao verificar: {e}", 0)
+        log_error(f"Check unwanted failed: {e}")
+        return {'downloading': 0, 'error': 0, 'total': 0}
+
+
+DRIFT_KEYS = ('category', 'tags_add', 'tags_remove', 'save_path', 'auto_tmm')
+
+
+def split_tags(tags) -> set:
+    """Tags no formato da API ("a, b") como set"""
+    if isinstance(tags, (list, tuple, set)):
+        return {tag.strip() for tag in tags if tag.strip()}
+    return {tag.strip() for tag in (tags or '').split(',') if tag.strip()}
+
+
+def normalize_path(path: str) -> str:
+    """save_path sem barra final, para comparar origem e destino"""
+    path = path or ''
+    return path.rstrip('/\\') or path
+
+
+def find_drift(src_by_hash: dict, dst_torrents: list, fields) -> dict:
+    """
+    Diferenças de categoria, tags e save_path/auto_tmm nos hashes em comum
+    
+    Os hashes são agrupados pelo valor alvo, para que cada grupo vire uma
+    única chamada multi-hash. O save_path só é comparado quando a origem não
+    usa auto_tmm (com auto_tmm o local vem da categoria).
+    
+    Args:
+        src_by_hash: hash -> torrent da origem
+        dst_torrents: Torrents do destino
+        fields: Campos comparados ('category', 'tags', 'save_path')
+    
+    Returns:
+        Dict com DRIFT_KEYS (valor alvo -> [hashes]; tags como tupla
+        ordenada) e 'torrents' (hash -> (torrent da origem, descrição))
+    """
+    drift = {key: {} for key in DRIFT_KEYS}
+    drift['torrents'] = {}
+    
+    for d in dst_torrents:
+        s = src_by_hash.get(d.hash)
+        if s is None:
+            continue
+        
+        changes = []
+        
+        if 'category' in fields and (s.category or '') != (d.category or ''):
+            drift['category'].setdefault(s.category or '', []).append(d.hash)
+            changes.append(f"categoria {d.category or '-'} → {s.category or '-'}")
+        
+        if 'tags' in fields:
+            src_tags, dst_tags = split_tags(s.tags), split_tags(d.tags)
+            missing, extra = src_tags - dst_tags, dst_tags - src_tags
+            if missing:
+                drift['tags_add'].setdefault(tuple(sorted(missing)), []).append(d.hash)
+                changes.append(f"+tags {', '.join(sorted(missing))}")
+            if extra:
+                drift['tags_remove'].setdefault(tuple(sorted(extra)), []).append(d.hash)
+                changes.append(f"-tags {', '.join(sorted(extra))}")
+        
+        if 'save_path' in fields:
+            if bool(s.auto_tmm) != bool(d.auto_tmm):
+                drift['auto_tmm'].setdefault(bool(s.auto_tmm), []).append(d.hash)
+                changes.append(f"auto_tmm {bool(s.auto_tmm)}")
+            if not s.auto_tmm and normalize_path(s.save_path) != normalize_path(d.save_path):
+                drift['save_path'].setdefault(s.save_path, []).append(d.hash)
+                changes.append(f"save_path {d.save_path} → {s.save_path}")
+        
+        if changes:
+            drift['torrents'][d.hash] = (s, '; '.join(changes))
+    
+    return drift
+
+
+def apply_drift(dst, drift: dict) -> set:
+    """
+    Aplica as diferenças de find_drift com chamadas multi-hash em lote
+    
+    Ordem: desliga auto_tmm (para o setLocation valer), categoria, tags,
+    local e por fim liga auto_tmm (move para o local da categoria já certa).
+    Cada grupo é enviado em pedaços de HASH_CHUNK_SIZE.
+    
+    Returns:
+        Set de hashes com alguma chamada falha
+    """
+    chunk_size = getattr(config, 'HASH_CHUNK_SIZE', 500)
+    failed = set()
+    
+    calls = [('auto_tmm off', 'torrents_set_auto_management', {'enable': False}, drift['auto_tmm'].get(False))]
+    calls += [(f"categoria {category or '-'}", 'torrents_set_category', {'category': category}, hashes)
+              for category, hashes in drift['category'].items()]
+    calls += [(f"+tags {', '.join(tags)}", 'torrents_add_tags', {'tags': list(tags)}, hashes)
+              for tags, hashes in drift['tags_add'].items()]
+    calls += [(f"-tags {', '.join(tags)}", 'torrents_remove_tags', {'tags': list(tags)}, hashes)
+              for tags, hashes in drift['tags_remove'].items()]
+    calls += [(f"local {path}", 'torrents_set_location', {'location': path}, hashes)
+              for path, hashes in drift['save_path'].items()]
+    calls.append(('auto_tmm on', 'torrents_set_auto_management', {'enable': True}, drift['auto_tmm'].get(True)))
+    
+    for label, method, kwargs, hashes in calls:
+        for chunk in chunked(hashes or [], chunk_size):
+            try:
+                getattr(dst, method)(torrent_hashes=chunk, **kwargs)
+                log("     🔄 %s (%d)", 2, label, len(chunk))
+            except Exception as e:
+                log_error(f"Reconcile failed: {label} ({len(chunk)} hashes): {e}")
+                failed.update(chunk)
+    
+    return failed
+
+
+def process_hash_batch(src, destinations: list, db: SyncDatabase, hashes: List[str],
+                       stop: Optional[threading.Event] = None) -> tuple[int, int]:
+    """
+    Clona um lote de hashes vindos do hook em todos os destinos
+    
+    Busca e filtra os hashes na origem uma vez; blacklist e existência são
+    verificadas por destino com consultas multi-hash. Cada .torrent é exportado
+    uma única vez e os destinos são clonados em paralelo.
+    
+    Returns:
+        Tupla (clonados, falhas) somando todos os destinos
+    """
+    found = InstanceReader(src).by_hashes(hashes)
+    
+    missing = len(hashes) - len(found)
+    if missing:
+        log(f"  ⚠️  {missing} hashes não encontrados na origem", 1)
+    
+    passed = []
+    for t in found:
+        ok, reason = apply_filters(t)
+        if ok:
+            passed.append(t)
+        else:
+            log("  ⏭️  %s filtrado: %s", 2, t.name[:45], reason)
+    
+    plans = []
+    for dst in destinations:
+        blacklist_hashes = db.get_blacklist_hashes(dst.name)
+        candidates = [t for t in passed if t.hash not in blacklist_hashes]
+        
+        existing = {t.hash for t in InstanceReader(dst).by_hashes(t.hash for t in candidates)}
+        
+        to_clone = [t for t in candidates if t.hash not in existing]
+        log(f"  🎯 {dst.name}: {len(passed) - len(candidates)} na blacklist | "
+            f"{len(existing)} já existem | {len(to_clone)} a clonar", 1)
+        
+        if to_clone:
+            plans.append((dst, to_clone))
+    
+    if not plans:
+        return 0, 0
+    
+    exporter = TorrentExporter(src, Counter(t.hash for _, to_clone in plans for t in to_clone),
+                               get_torrent_cache())
+    
+    fresh_since = category_cache_since()
+    
+    def clone_to(dst, to_clone):
+        LOG_CONTEXT['destination'].set(dst.name)
+        sync_categories(src, dst, db, fresh_since, {t.category for t in to_clone if t.category})
+        return clone_torrents_parallel(src, dst, to_clone, db, exporter, stop)
+    
+    with ThreadPoolExecutor(max_workers=len(plans), thread_name_prefix='dest') as pool:
+        futures = [submit_in_context(pool, clone_to, dst, to_clone) for dst, to_clone in plans]
+        results = [f.result() for f in futures]
+    
+    return sum(len(r[0]) for r in results), sum(r[1] for r in results)
+
+
+def drain_hook_queue(src, destinations: list, db: SyncDatabase,
+                     stop: Optional[threading.Event] = None) -> int:
+    """
+    Consome a fila do hook em lotes de HOOK_BATCH_SIZE até esvaziar
+    
+    Com `stop` setado (encerramento do daemon) não começa outro lote; um lote
+    interrompido fica na fila e os já clonados aparecem como existentes na
+    próxima drenagem.
+    
+    Returns:
+        Número de hashes processados
+    """
+    batch_size = getattr(config, 'HOOK_BATCH_SIZE', 500)
+    processed = 0
+    
+    while not (stop is not None and stop.is_set()):
+        hashes = db.peek_hook_queue(batch_size)
+        if not hashes:
+            METRICS.set('hook_queue_depth', 0)
+            break
+        
+        # ID do lote só nos logs do lote (o daemon segue com os seus depois)
+        batch_id = new_correlation_id()
+        with log_context(sync_id=batch_id):
+            log(f"\n📥 Fila do hook: {len(hashes)} hashes (lote {batch_id})", 1)
+            cloned, failed = process_hash_batch(src, destinations, db, hashes, stop)
+            log(f"  📊 Clonados: {cloned} | Falhas: {failed}", 1)
+        
+        if stop is not None and stop.is_set():
+            break
+        
+        # Exceções (API fora, erro de banco) sobem antes daqui e o lote fica na fila
+        db.ack_hook_queue(hashes)
+        METRICS.set('hook_queue_depth', db.hook_queue_size())
+        processed += len(hashes)
+    
+    return processed
+
+
+class QueueConsumerLock:
+    """Lock de arquivo garantindo um único consumidor da fila do hook"""
+    
+    def __init__(self, db_path: str):
+        self.path = f"{db_path}.queue.lock"
+        self._fd = None
+    
+    def acquire(self) -> bool:
+        """Tenta obter o lock sem bloquear"""
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+    
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+    
+    def is_held_elsewhere(self) -> bool:
+        """True se outro processo (consumidor ou daemon) já detém o lock"""
+        if not self.acquire():
+            return True
+        self.release()
+        return False
+
+
+def enqueue_from_hook(torrent_hash: str):
+    """
+    Modo hook: apenas enfileira o hash e retorna
+    
+    Se não houver consumidor ativo (daemon ou --drain-queue), dispara um em
+    segundo plano. Rajadas de hooks caem todas na mesma fila e são clonadas
+    juntas por esse único consumidor.
+    """
+    db = open_database()
+    db.enqueue_hashes([torrent_hash.lower()])
+    log(f"📥 Hash {torrent_hash} enfileirado", 1)
+    
+    if QueueConsumerLock(config.DATABASE_FILE).is_held_elsewhere():
+        return
+    
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--drain-queue'],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        close_fds=True
+    )
+    log("🚀 Consumidor da fila iniciado", 1)
+
+
+def run_queue_consumer():
+    """
+    Consumidor único da fila do hook (--drain-queue)
+    
+    Aguarda HOOK_COALESCE_DELAY para a rajada acumular, conecta uma única vez
+    e clona tudo que estiver na fila em lotes. Sai se outro consumidor já
+    estiver ativo.
+    """
+    db = open_database()
+    lock = QueueConsumerLock(config.DATABASE_FILE)
+    clients = None
+    
+    while lock.acquire():
+        try:
+            time.sleep(getattr(config, 'HOOK_COALESCE_DELAY', 5))
+            
+            if clients is None and db.hook_queue_size():
+                log(f"\n🎯 Modo: Fila do hook ({db.hook_queue_size()} hashes)", 1)
+                clients = get_clients()
+            
+            if clients:
+                drain_hook_queue(*clients, db)
+        finally:
+            lock.release()
+        
+        # Hash enfileirado entre o último lote e a liberação do lock
+        if not db.hook_queue_size():
+            break
+
+
+def log_rate(client):
+    """Mostra a taxa atual do RateController e o reuso de conexões da instância"""
+    rate = getattr(client, 'rate', None)
+    if rate is None:
+        return
+    
+    r = rate.stats()
+    log(f"  ⚡ Taxa: {r['rate']:.1f} req/s | {r['requests']} requisições | "
+        f"{r['throttled']} lentas/recusadas", 1)
+    
+    c = connection_stats(client)
+    if c['requests']:
+        log(f"  🔗 Conexões: {c['connections']} abertas | {c['requests']} requisições HTTP | "
+            f"{c['reused'] / c['requests']:.0%} reaproveitadas", 1)
+
+
+class PhaseScheduler:
+    """
+    Executa as fases da sincronização assim que suas dependências terminam
+    
+    Cada fase recebe os resultados das dependências (na ordem declarada) e
+    roda em uma thread própria com os IDs de correlação de quem chamou run().
+    Dependências em `after` só ordenam a execução, sem passar resultado, e
+    as em `optional` só precisam terminar (o resultado é None se falharam).
+    Fases sem dependência entre si rodam ao mesmo tempo e dividem o mesmo
+    orçamento de requisições, que continua no InstanceClient de cada
+    instância. Se uma fase falha, as que dependem dela são puladas, as
+    demais seguem e run() devolve a exceção de cada fase que falhou junto
+    com os resultados. Com o evento `stop` setado nenhuma fase nova começa;
+    as em andamento terminam.
+    """
+    
+    def __init__(self):
+        self._phases = {}  # nome -> (função, dependências, after, optional, fase da métrica, destino)
+    
+    def add(self, name: str, fn, deps: tuple = (), after: tuple = (),
+            phase: Optional[str] = None, destination: Optional[str] = None,
+            optional: tuple = ()):
+        """
+        Registra uma fase
+        
+        Args:
+            deps: Nomes das fases cujos resultados são passados para fn
+            after: Nomes das fases que precisam terminar antes (sem resultado)
+            optional: Fases que precisam terminar, com sucesso ou não; os
+                resultados (None nas que falharam) vêm depois dos de deps
+            phase: Label de phase_duration_seconds (None = não mede)
+            destination: Destino da fase (label da métrica e contexto dos logs)
+        """
+        self._phases[name] = (fn, tuple(deps), tuple(after), tuple(optional), phase, destination)
+    
+    @staticmethod
+    def _run(fn, args: list, phase: Optional[str], destination: Optional[str]):
+        if destination is not None:
+            LOG_CONTEXT['destination'].set(destination)
+        if phase is None:
+            return fn(*args)
+        
+        labels = {'destination': destination} if destination is not None else {}
+        with METRICS.timer('phase_duration_seconds', phase=phase, **labels):
+            return fn(*args)
+    
+    def run(self, stop: Optional[threading.Event] = None) -> dict:
+        """
+        Executa todas as fases
+        
+        Args:
+            stop: Evento de encerramento; fases ainda não iniciadas são canceladas
+        
+        Returns:
+            Tupla (nome -> resultado, nome -> exceção); fases puladas ou
+            canceladas não aparecem em nenhum dos dois
+        """
+        pending = dict(self._phases)
+        results = {}
+        failed = set()
+        errors = {}
+        futures = {}
+        
+        with ThreadPoolExecutor(max_workers=max(1, len(pending)), thread_name_prefix='phase') as pool:
+            while pending or futures:
+                if pending and stop is not None and stop.is_set():
+                    log(f"  ⏹️  {len(pending)} fases canceladas (encerrando): {', '.join(pending)}", 1)
+                    failed.update(pending)
+                    pending.clear()
+                
+                for name, (fn, deps, after, optional, phase, destination) in list(pending.items()):
+                    required = deps + after
+                    if any(d in failed for d in required):
+                        log(f"  ⏭️  Fase {name} pulada (dependência falhou)", 1)
+                        failed.add(name)
+                        del pending[name]
+                    elif (all(d in results for d in required)
+                          and all(d in results or d in failed for d in optional)):
+                        args = [results[d] for d in deps] + [results.get(d) for d in optional]
+                        futures[submit_in_context(pool, self._run, fn, args, phase, destination)] = name
+                        del pending[name]
+                
+                if not futures:
+                    if not pending:
+                        break
+                    # Dependência inexistente ou ciclo: nada mais pode rodar
+                    raise RuntimeError(f"Fases sem dependências satisfeitas: {', '.join(pending)}")
+                
+                done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = futures.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        log(f"  ❌ Fase {name} falhou: {e}", 0)
+                        log_error(f"Phase {name} failed: {e}")
+                        failed.add(name)
+                        errors[name] = e
+        
+        return results, errors
+
+
+def snapshot_source(src_view) -> tuple[list, set]:
+    """
+    PASSO 1: Torrents da origem em seeding que passam nos filtros
+    
+    Returns:
+        Tupla (torrents filtrados, set de hashes)
+    """
+    log("\n📸 [1/5] Capturando estado da origem...", 1)
+    # Estado e categorias são filtrados no servidor; o resto em apply_filters
+    src_seeding = InstanceReader(src_view).select('seeding', config.FILTER_CATEGORIES)
+    seeding_count = len(src_seeding)
+    
+    src_filtered = [t for t in src_seeding if apply_filters(t)[0]]
+    del src_seeding
+    
+    log(f"  📊 {seeding_count} em seeding → {len(src_filtered)} após filtros", 1)
+    return src_filtered, {t.hash for t in src_filtered}
+
+
+def save_source_state(db: SyncDatabase, snapshot: tuple) -> dict:
+    """PASSO 1 (banco): grava o snapshot em state_origem por diff"""
+    state_changes = db.update_state_origem(snapshot[0])
+    log(f"  ✅ State atualizado (+{len(state_changes['added'])} "
+        f"~{len(state_changes['changed'])} -{len(state_changes['removed'])})", 1)
+    return state_changes
+
+
+def cleanup_blacklist(db: SyncDatabase) -> int:
+    """PASSO 2: remove da blacklist o que não existe mais na origem"""
+    log("\n🧹 [2/5] Limpando blacklist...", 1)
+    removed = db.cleanup_blacklist()
+    
+    if removed > 0:
+        log(f"  ✅ {removed} torrents removidos da blacklist (não existem mais na origem)", 1)
+    else:
+        log(f"  ✅ Blacklist OK", 1)
+    
+    return removed
+
+
+def plan_destination(dst, db: SyncDatabase, snapshot: tuple, dst_hashes: set) -> list:
+    """Faltantes no destino: não existe nele E não está na blacklist dele"""
+    blacklist_hashes = db.get_blacklist_hashes(dst.name)
+    
+    # Passada única sobre a origem com verificação em sets de hashes
+    to_clone = []
+    skipped_blacklist = 0
+    for t in snapshot[0]:
+        if t.hash in dst_hashes:
+            continue
+        if t.hash in blacklist_hashes:
+            skipped_blacklist += 1
+        else:
+            to_clone.append(t)
+    
+    log(f"  🎯 {dst.name}: {len(dst_hashes)} no destino | {len(blacklist_hashes)} na blacklist | "
+        f"{skipped_blacklist} pulados | {len(to_clone)} a clonar", 1)
+    
+    return to_clone
 
 
-def get_clients():
-    """Conecta nas instâncias"""
-    log("🔌 Conectando...", 1)
+def clone_missing(src, dst, db: SyncDatabase, to_clone: list, exporter: TorrentExporter,
+                  stop: Optional[threading.Event] = None) -> tuple[list, int]:
+    """
+    PASSO 3: Clona faltantes (pula blacklist)
     
-    try:
-        src = Client(
-            host=build_url(config.SRC_HOST, config.SRC_PORT, config.SRC_USE_HTTPS),
-            username=config.SRC_USER,
-            password=config.SRC_PASS,
-            VERIFY_WEBUI_CERTIFICATE=config.SRC_VERIFY_SSL,
-            REQUESTS_ARGS={'timeout': config.REQUEST_TIMEOUT}
-        )
-        
-        dst = Client(
-            host=build_url(config.DST_HOST, config.DST_PORT, config.DST_USE_HTTPS),
-            username=config.DST_USER,
-            password=config.DST_PASS,
-            VERIFY_WEBUI_CERTIFICATE=config.DST_VERIFY_SSL,
-            REQUESTS_ARGS={'timeout': config.REQUEST_TIMEOUT}
-        )
-        
-        src.auth_log_in()
-        dst.auth_log_in()
-        
-        log(f"✅ ORIGEM: {config.SRC_HOST}:{config.SRC_PORT} | v{src.app.version}", 1)
-        log(f"✅ DESTINO: {config.DST_HOST}:{config.DST_PORT} | v{dst.app.version}", 1)
-        
-        return src, dst
-        
-    except Exception as e:
-        log(f"❌ Erro de autenticação: {e}", 0)
-        log_error(f"Auth error: {e}")
-        sys.exit(1)
+    Returns:
+        Tupla (hashes clonados, falhas)
+    """
+    log(f"\n⬇️  [3/5] Clonando faltantes ({dst.name})...", 1)
+    
+    if not to_clone:
+        log(f"  ✅ Nada para clonar", 1)
+        return [], 0
+    
+    force_msg = " (com force upload)" if config.FORCE_UPLOAD else ""
+    workers = max(1, getattr(config, 'CLONE_WORKERS', 4))
+    log(f"  🚀 Clonando {len(to_clone)} torrents{force_msg} com {workers} workers...", 1)
+    
+    cloned, failed = clone_torrents_parallel(src, dst, to_clone, db, exporter, stop)
+    
+    if cloned:
+        log(f"\n  💾 {len(cloned)} torrents gravados no banco em lotes", 1)
+    
+    log(f"\n  📊 Clonados: {len(cloned)} | Falhas: {failed}", 1)
+    return cloned, failed
 
 
-def apply_filters(torrent) -> tuple[bool, str]:
-    """Aplica filtros configurados"""
-    if config.ONLY_SEEDING_STATE:
-        if torrent.state not in config.VALID_SEEDING_STATES:
-            return False, f"Estado {torrent.state} inválido"
+def delete_orphans(dst, reader: InstanceReader, db: SyncDatabase, snapshot: tuple) -> int:
+    """
+    PASSO 4: Remove do destino o que não existe mais na origem
     
-    if config.FILTER_CATEGORIES:
-        if torrent.category not in config.FILTER_CATEGORIES:
-            return False, f"Categoria filtrada"
+    Roda junto com a clonagem: órfãos e faltantes são conjuntos disjuntos,
+    e a listagem inicial do destino continua válida (os clonados estão
+    todos na origem).
     
-    if config.MIN_SIZE_GB:
-        if torrent.size / (1024**3) < config.MIN_SIZE_GB:
-            return False, "Tamanho menor que mínimo"
+    Returns:
+        Número de órfãos removidos
+    """
+    name = dst.name
+    log(f"\n🗑️  [4/5] Limpando órfãos ({name})...", 1)
     
-    if config.MIN_RATIO and torrent.ratio < config.MIN_RATIO:
-        return False, "Ratio menor que mínimo"
+    origem_hashes = snapshot[1]
+    to_delete = [t for t in reader.all() if t.hash not in origem_hashes]
     
-    if config.MIN_UPLOAD_GB:
-        if torrent.uploaded / (1024**3) < config.MIN_UPLOAD_GB:
-            return False, "Upload menor que mínimo"
+    if not to_delete:
+        log(f"  ✅ Sem órfãos", 1)
+        return 0
     
-    return True, "OK"
+    log(f"  🗑️  {len(to_delete)} órfãos detectados", 1)
+    
+    delete_files = (config.CLEANUP_MODE == 'delete')
+    confirmed, failed_items = delete_torrents_bulk(
+        dst, [(t.hash, delete_files, t) for t in to_delete]
+    )
+    
+    deleted_batch = [(t.hash, t.name) for t in confirmed]
+    reader.track(removed=[h for h, _ in deleted_batch])
+    
+    if deleted_batch:
+        log(f"\n  💾 Atualizando banco ({len(deleted_batch)} remoções)...", 1)
+        db.remove_cloned_batch(deleted_batch, name)
+        log(f"  ✅ Banco atualizado em lote", 1)
+    
+    action = "deletados" if config.CLEANUP_MODE == 'delete' else "removidos"
+    log(f"\n  📊 {action}: {len(deleted_batch)} | Falhas: {len(failed_items)}", 1)
+    
+    METRICS.inc('operations_total', len(deleted_batch), operation='delete_orphan', destination=name, result='success')
+    METRICS.inc('operations_total', len(failed_items), operation='delete_orphan', destination=name, result='failure')
+    
+    return len(deleted_batch)
 
 
-def sync_categories(src, dst):
-    """Sincroniza categorias"""
-    log("\n📂 Sincronizando categorias...", 1)
+def check_unwanted(dst, db: SyncDatabase, reader: InstanceReader, clone_result: tuple) -> dict:
+    """PASSO 5: Remove torrents em download/erro + adiciona blacklist"""
+    log(f"\n🚫 [5/5] Verificando torrents indesejados ({dst.name})...", 1)
+    reader.track(added=clone_result[0])
+    return remove_unwanted_torrents(dst, db, reader)
+
+
+def settle_clones(dst, clone_result: tuple) -> int:
+    """
+    Aguarda os clonados saírem de estados transitórios
     
-    try:
-        src_cats = src.torrents_categories()
-        dst_cats = dst.torrents_categories()
-        
-        created = 0
-        for name, info in src_cats.items():
-            if config.FILTER_CATEGORIES and name not in config.FILTER_CATEGORIES:
-                continue
-            
-            if name not in dst_cats:
-                dst.torrents_create_category(name=name, save_path=info.get('savePath', ''))
-                log(f"  ➕ {name}", 1)
-                created += 1
-        
-        log(f"  ✅ {created} categorias criadas" if created else "  ✅ Categorias OK", 1)
-        
-    except Exception as e:
-        log(f"  ⚠️  Erro: {e}", 0)
+    Returns:
+        Quantos ainda estavam em verificação no prazo
+    """
+    cloned = clone_result[0]
+    if not cloned:
+        return 0
+    
+    log(f"\n⏰ Aguardando {len(cloned)} clonados assentarem ({dst.name})...", 1)
+    start = time.monotonic()
+    unsettled = wait_for_settle(dst, cloned)
+    elapsed = time.monotonic() - start
+    
+    if unsettled:
+        log(f"  ⚠️  {unsettled} ainda em verificação após {elapsed:.1f}s (prazo SETTLE_TIMEOUT)", 1)
+    else:
+        log(f"  ✅ Todos assentados em {elapsed:.1f}s", 1)
+    
+    return unsettled
 
 
-def clone_torrent_verified(src, dst, torrent) -> bool:
-    """Clona torrent e confirma adição com force upload"""
-    try:
-        torrent_file = src.torrents_export(torrent_hash=torrent.hash)
-        if not torrent_file:
-            log(f"     ⚠️  Falha ao exportar .torrent", 2)
-            return False
-        
-        result = dst.torrents_add(
-            torrent_files=torrent_file,
-            save_path=torrent.save_path,
-            category=torrent.category,
-            tags=torrent.tags,
-            is_skip_checking=config.SKIP_CHECKING,
-            is_paused=config.START_PAUSED,
-            use_auto_torrent_management=torrent.auto_tmm
-        )
-        
-        if result != "Ok.":
-            log(f"     ⚠️  API retornou: {result}", 2)
-            return False
-        
-        clone_confirmed = False
-        for attempt in range(2):
-            time.sleep(0.5)
-            check = dst.torrents_info(torrent_hashes=torrent.hash)
-            if check:
-                clone_confirmed = True
-                break
-        
-        if not clone_confirmed:
-            log_error(f"Clone unconfirmed: {torrent.hash}")
-            return False
-        
-        if config.FORCE_UPLOAD:
-            try:
-                dst.torrents_set_force_start(torrent_hashes=torrent.hash, enable=True)
-                log(f"     ⚡ Force upload ativado", 2)
-            except Exception as e:
-                log_error(f"Force upload failed {torrent.hash}: {e}")
-        
-        return True
-        
-    except Exception as e:
-        log_error(f"Clone error {torrent.hash}: {e}")
-        return False
+def detect_drift(dst, reader: InstanceReader, snapshot: tuple) -> dict:
+    """
+    Divergências dos torrents já clonados (RECONCILE_FIELDS)
+    
+    Reaproveita a listagem do destino do ciclo; só hashes que existem nos
+    dois lados entram na comparação.
+    """
+    fields = getattr(config, 'RECONCILE_FIELDS', ('category', 'tags', 'save_path')) or ()
+    if not fields:
+        return find_drift({}, [], fields)
+    
+    src_by_hash = {t.hash: t for t in snapshot[0]}
+    return find_drift(src_by_hash, reader.all(), fields)
 
 
-def delete_torrent_verified(dst, torrent) -> bool:
-    """Deleta torrent e confirma remoção"""
-    try:
-        delete_files = (config.CLEANUP_MODE == 'delete')
-        dst.torrents_delete(delete_files=delete_files, torrent_hashes=torrent.hash)
-        
-        delete_confirmed = False
-        for attempt in range(2):
-            time.sleep(0.5)
-            if not dst.torrents_info(torrent_hashes=torrent.hash):
-                delete_confirmed = True
-                break
-        
-        if not delete_confirmed:
-            log_error(f"Delete unconfirmed: {torrent.hash}")
-            return False
-        
-        return True
-        
-    except Exception as e:
-        log_error(f"Delete error {torrent.hash}: {e}")
-        return False
+def ensure_categories(src, dst, db: SyncDatabase, fresh_since: Optional[float], to_clone: list, drift: dict):
+    """
+    Sincroniza categorias antes de clonar e reconciliar
+    
+    Roda em todo ciclo para levar ao destino mudanças de savePath mesmo sem
+    nada a clonar; sem mudanças, o cache com impressão digital evita escritas
+    (e, no daemon, também as leituras).
+    """
+    required = {t.category for t in to_clone if t.category} | {c for c in drift['category'] if c}
+    sync_categories(src, dst, db, fresh_since, required)
 
 
-def remove_unwanted_torrents(dst, db: SyncDatabase) -> dict:
+def reconcile_drift(dst, db: SyncDatabase, drift: dict) -> int:
     """
-    Remove torrents indesejados e adiciona à blacklist
+    Aplica no destino as mudanças de categoria, tags e local da origem
+    
+    Returns:
+        Número de torrents reconciliados
     """
-    log("\n🚫 Removendo torrents indesejados...", 1)
+    name = dst.name
+    log(f"\n🔄 Reconciliando divergências ({name})...", 1)
     
-    try:
-        dst_torrents = dst.torrents_info()
-        
-        downloading_states = [
-            'downloading', 'metaDL', 'allocating', 'checkingDL',
-            'pausedDL', 'queuedDL', 'stalledDL', 'forcedDL'
-        ]
-        
-        error_states = ['error', 'missingFiles', 'unknown']
-        
-        downloading = [t for t in dst_torrents if t.state in downloading_states]
-        errored = [t for t in dst_torrents if t.state in error_states]
-        
-        total_unwanted = len(downloading) + len(errored)
-        
-        if total_unwanted == 0:
-            log(f"  ✅ Nenhum torrent indesejado", 1)
-            return {'downloading': 0, 'error': 0, 'total': 0}
-        
-        log(f"  🚫 {total_unwanted} torrents indesejados detectados:", 1)
-        if downloading:
-            log(f"     📥 {len(downloading)} em download", 1)
-        if errored:
-            log(f"     ⚠️  {len(errored)} com erro", 1)
-        
-        removed_batch = []
-        blacklist_batch = []
-        failed = 0
-        to_remove = downloading + errored
-        
-        for idx, t in enumerate(to_remove, 1):
-            is_download = t.state in downloading_states
-            reason = "download" if is_download else f"erro:{t.state}"
-            
-            log(f"  [{idx}/{len(to_remove)}] {t.name[:45]}... ({reason})", 1)
-            
-            try:
-                dst.torrents_delete(delete_files=False, torrent_hashes=t.hash)
-                time.sleep(0.5)
-                
-                if not dst.torrents_info(torrent_hashes=t.hash):
-                    removed_batch.append((t.hash, t.name))
-                    blacklist_batch.append((t.hash, t.name, reason))
-                    log(f"     ✅ Removido e adicionado à blacklist", 1)
-                else:
-                    log(f"     ❌ Falha ao remover", 0)
-                    failed += 1
-                
-            except Exception as e:
-                log(f"     ❌ Erro: {e}", 0)
-                log_error(f"Remove unwanted error {t.hash}: {e}")
-                failed += 1
-            
-            time.sleep(0.2)
-        
-        # Atualiza banco
-        if removed_batch:
-            log(f"\n  💾 Atualizando banco ({len(removed_batch)} remoções)...", 1)
-            db.remove_cloned_batch(removed_batch)
-            log(f"  ✅ Banco atualizado", 1)
-        
-        # Adiciona à blacklist
-        if blacklist_batch:
-            log(f"  🚷 Adicionando {len(blacklist_batch)} à blacklist...", 1)
-            db.add_to_blacklist_batch(blacklist_batch)
-            log(f"  ✅ Blacklist atualizada", 1)
-        
-        log(f"\n  📊 Removidos: {len(removed_batch)} | Falhas: {failed}", 1)
-        
-        return {
-            'downloading': len(downloading),
-            'error': len(errored),
-            'total': len(removed_batch)
-        }
-        
-    except Exception as e:
-        log(f"  ⚠️  Erro ao verificar: {e}", 0)
-        log_error(f"Check unwanted failed: {e}")
-        return {'downloading': 0, 'error': 0, 'total': 0}
+    torrents = drift['torrents']
+    if not torrents:
+        log(f"  ✅ Sem divergências", 1)
+        return 0
+    
+    counts = ' | '.join(f"{label}: {sum(len(h) for h in drift[key].values())}"
+                        for key, label in (('category', 'categoria'), ('tags_add', '+tags'),
+                                           ('tags_remove', '-tags'), ('save_path', 'local'),
+                                           ('auto_tmm', 'auto_tmm'))
+                        if drift[key])
+    log(f"  🔄 {len(torrents)} torrents divergentes ({counts})", 1)
+    
+    for torrent_hash, (t, details) in torrents.items():
+        log("     • %s... (%s)", 2, t.name[:45], details)
+    
+    failed = apply_drift(dst, drift)
+    
+    reconciled = [(h, t.name, t.category, details)
+                  for h, (t, details) in torrents.items() if h not in failed]
+    if reconciled:
+        db.add_reconcile_batch(reconciled, name)
+    
+    log(f"\n  📊 Reconciliados: {len(reconciled)} | Falhas: {len(failed)}", 1)
+    
+    METRICS.inc('operations_total', len(reconciled), operation='reconcile', destination=name, result='success')
+    METRICS.inc('operations_total', len(failed), operation='reconcile', destination=name, result='failure')
+    
+    return len(reconciled)
 
 
-def execute_sync(single_hash: Optional[str] = None):
+def execute_sync(single_hash: Optional[str] = None, clients: Optional[tuple] = None,
+                 db: Optional[SyncDatabase] = None, views: Optional[tuple] = None,
+                 stop: Optional[threading.Event] = None):
     """
     TAREFA ÚNICA DE SINCRONIZAÇÃO COM BLACKLIST INTELIGENTE
     
-    1. Snapshot origem → state_origem
+    1. Snapshot origem → state_origem (uma vez para todos os destinos)
     2. Limpa blacklist (remove se não existe mais na origem)
-    3. Clona faltantes (pula blacklist)
+    3. Clona faltantes (pula blacklist do destino)
     4. Remove órfãos
-    5. Aguarda 10s (se clonou)
-    6. Remove download/erro + adiciona blacklist
+    5. Reconcilia categoria, tags e local dos que já existem no destino
+    6. Aguarda os clonados assentarem (se clonou)
+    7. Remove download/erro + adiciona blacklist
+    
+    Os passos rodam no PhaseScheduler, cada um assim que suas entradas estão
+    prontas: a listagem dos destinos começa junto com a da origem, e a
+    clonagem, a remoção de órfãos e a limpeza da blacklist rodam ao mesmo
+    tempo. Só a verificação de download/erro espera os clonados assentarem
+    (e os órfãos saírem e a reconciliação terminar). Cada .torrent necessário é exportado da origem uma
+    única vez.
+    
+    Args:
+        clients: Tupla (src, destinos) já autenticada (modo daemon); se None, conecta
+        db: Banco já aberto; se None, abre DATABASE_FILE
+        views: Tupla (src_view, [dst_view, ...]) de leitura mantida entre ciclos
+        stop: Evento de encerramento do daemon; interrompe o ciclo sem iniciar
+            novas fases nem novos lotes de clonagem
+    
+    Returns:
+        Dict fase -> exceção das fases que falharam (vazio se tudo correu
+        bem); uma falha de conexão ou sessão é relançada após o resumo
     """
     
-    db = SyncDatabase(config.DATABASE_FILE)
-    src, dst = get_clients()
+    sync_id = new_correlation_id()
+    LOG_CONTEXT['sync_id'].set(sync_id)
+    log(f"🆔 Execução {sync_id}", 2)
     
-    # ========== MODO SINGLE HASH (via hook) ==========
+    db = db or open_database()
+    src, destinations = clients or get_clients()
+    
+    # ========== MODO SINGLE HASH (via hook, sem fila) ==========
     if single_hash:
         log(f"\n🎯 Modo: Hook (hash: {single_hash})", 1)
+        cloned, failed = process_hash_batch(src, destinations, db, [single_hash.lower()])
         
-        # Verifica blacklist
-        if db.get_blacklist_hashes() and single_hash in db.get_blacklist_hashes():
-            log(f"🚷 Torrent está na blacklist, pulando...", 1)
-            return
-        
-        torrents = src.torrents_info(torrent_hashes=single_hash)
-        if not torrents:
-            log("⚠️  Hash não encontrado", 0)
-            return
-        
-        t = torrents[0]
-        
-        passed, reason = apply_filters(t)
-        if not passed:
-            log(f"⏭️  Filtrado: {reason}", 1)
-            return
-        
-        if dst.torrents_info(torrent_hashes=single_hash):
-            log("⏭️  Já existe no destino", 1)
-            return
-        
-        sync_categories(src, dst)
-        
-        log(f"\n🔄 {t.name}", 1)
-        log(f"   {t.size / (1024**3):.2f} GB | Ratio: {t.ratio:.2f}", 1)
-        
-        if clone_torrent_verified(src, dst, t):
-            db.add_cloned_batch([(t.hash, t.name, t.category or '', t.size)])
+        if cloned:
             force_msg = " + force upload" if config.FORCE_UPLOAD else ""
-            log(f"   ✅ Clonado{force_msg}", 1)
-        else:
-            log("   ❌ Falha", 0)
+            log(f"   ✅ Clonado em {cloned} destino(s){force_msg}", 1)
+        if failed:
+            log(f"   ❌ Falha em {failed} destino(s)", 0)
         
         return
     
     # ========== MODO SINCRONIZAÇÃO COMPLETA ==========
-    log(f"\n🎯 Modo: Sincronização completa", 1)
+    log(f"\n🎯 Modo: Sincronização completa ({len(destinations)} destino(s))", 1)
+    sync_start = time.monotonic()
     
     stats = db.get_stats()
     log(f"\n📊 Estado do banco:", 1)
@@ -654,158 +3116,300 @@ def execute_sync(single_hash: Optional[str] = None):
     log(f"  Skip Checking: {'✅ Ativado' if config.SKIP_CHECKING else '❌ Desativado'}", 1)
     log(f"  Cleanup Mode: {config.CLEANUP_MODE}", 1)
     
-    # PASSO 1: Snapshot da origem
-    log("\n📸 [1/5] Capturando estado da origem...", 1)
-    src_seeding = src.torrents_info(filter='seeding')
+    # Leituras via espelho incremental do daemon (sync/maindata) ou torrents_info completo
+    log(f"  Incremental: {'✅ Ativado' if views else '❌ Desativado'}", 1)
+    src_view, dst_views = views or (src, destinations)
     
-    src_filtered = []
-    for t in src_seeding:
-        passed, _ = apply_filters(t)
-        if passed:
-            src_filtered.append(t)
+    readers = [InstanceReader(dst_view) for dst_view in dst_views]
     
-    log(f"  📊 {len(src_seeding)} em seeding → {len(src_filtered)} após filtros", 1)
+    # Categorias: o daemon usa o cache dentro de CATEGORY_CACHE_TTL; execuções
+    # avulsas leem da API uma vez por ciclo
+    category_since = category_cache_since() if clients else time.time()
+    cache = get_torrent_cache()
+    cache_before = (cache.hits, cache.misses) if cache else (0, 0)
     
-    db.update_state_origem(src_filtered)
-    log(f"  ✅ State atualizado (batch)", 1)
+    def build_exporter(*plans):
+        # Cada .torrent é exportado uma vez, mesmo que vá para vários destinos;
+        # destinos cuja listagem falhou (plano None) ficam de fora
+        return TorrentExporter(src, Counter(t.hash for to_clone in plans if to_clone for t in to_clone), cache)
     
-    # PASSO 2: Limpa blacklist (remove se não existe mais na origem)
-    log("\n🧹 [2/5] Limpando blacklist...", 1)
-    origem_hashes = db.get_state_origem_hashes()
-    removed_from_blacklist = db.cleanup_blacklist(origem_hashes)
+    scheduler = PhaseScheduler()
+    scheduler.add('snapshot', partial(snapshot_source, src_view), phase='snapshot_fetch')
+    scheduler.add('state', partial(save_source_state, db), ['snapshot'], phase='snapshot_db')
+    scheduler.add('blacklist', partial(cleanup_blacklist, db), after=['state'], phase='blacklist_cleanup')
     
-    if removed_from_blacklist > 0:
-        log(f"  ✅ {removed_from_blacklist} torrents removidos da blacklist (não existem mais na origem)", 1)
-    else:
-        log(f"  ✅ Blacklist OK", 1)
+    for dst, reader in zip(destinations, readers):
+        name = dst.name
+        scheduler.add(f'fetch:{name}', reader.hashes, phase='plan', destination=name)
+        scheduler.add(f'plan:{name}', partial(plan_destination, dst, db),
+                      ['snapshot', f'fetch:{name}'], destination=name)
     
-    # PASSO 3: Clona faltantes (pula blacklist)
-    log("\n⬇️  [3/5] Clonando faltantes...", 1)
+    scheduler.add('exporter', build_exporter, optional=[f'plan:{dst.name}' for dst in destinations])
     
-    dst_hashes = {t.hash for t in dst.torrents_info()}
-    blacklist_hashes = db.get_blacklist_hashes()
+    for dst, reader in zip(destinations, readers):
+        name = dst.name
+        scheduler.add(f'drift:{name}', partial(detect_drift, dst, reader),
+                      ['snapshot'], after=[f'fetch:{name}'], phase='plan', destination=name)
+        scheduler.add(f'categories:{name}', partial(ensure_categories, src, dst, db, category_since),
+                      [f'plan:{name}', f'drift:{name}'], phase='categories', destination=name)
+        scheduler.add(f'clone:{name}', partial(clone_missing, src, dst, db, stop=stop),
+                      [f'plan:{name}', 'exporter'], after=[f'categories:{name}'],
+                      phase='clone', destination=name)
+        scheduler.add(f'orphans:{name}', partial(delete_orphans, dst, reader, db),
+                      ['snapshot'], after=[f'fetch:{name}'], phase='orphans', destination=name)
+        scheduler.add(f'reconcile:{name}', partial(reconcile_drift, dst, db),
+                      [f'drift:{name}'], after=[f'categories:{name}'], phase='reconcile', destination=name)
+        scheduler.add(f'settle:{name}', partial(settle_clones, dst),
+                      [f'clone:{name}'], phase='settle', destination=name)
+        scheduler.add(f'unwanted:{name}', partial(check_unwanted, dst, db, reader),
+                      [f'clone:{name}'], after=[f'settle:{name}', f'orphans:{name}', f'reconcile:{name}'],
+                      phase='unwanted', destination=name)
     
-    log(f"  📊 {len(dst_hashes)} torrents no destino", 1)
-    log(f"  🚷 {len(blacklist_hashes)} torrents na blacklist", 1)
+    results, errors = scheduler.run(stop)
     
-    # Filtra: não existe no destino E não está na blacklist
-    to_clone = [t for t in src_filtered if t.hash not in dst_hashes and t.hash not in blacklist_hashes]
+    if stop is not None and stop.is_set():
+        log("\n⏹️  Sincronização interrompida; o restante fica para o próximo ciclo", 1)
+        return errors
     
-    skipped_blacklist = len([t for t in src_filtered if t.hash not in dst_hashes and t.hash in blacklist_hashes])
-    if skipped_blacklist > 0:
-        log(f"  ⏭️  {skipped_blacklist} torrents pulados (blacklist)", 1)
+    # Retenção do log de operações
+    retention_days = getattr(config, 'OPLOG_RETENTION_DAYS', 90)
+    if retention_days:
+        compacted = db.compact_operation_log(retention_days)
+        if compacted:
+            log(f"\n🗜️  {compacted} linhas antigas do log compactadas em agregados diários", 1)
     
-    cloned_something = False
+    METRICS.observe('phase_duration_seconds', time.monotonic() - sync_start, phase='total')
+    METRICS.set('last_sync_timestamp_seconds', time.time())
     
-    if to_clone:
-        sync_categories(src, dst)
-        
-        force_msg = " (com force upload)" if config.FORCE_UPLOAD else ""
-        log(f"  🚀 Clonando {len(to_clone)} torrents{force_msg}...", 1)
-        
-        success_batch = []
-        failed = 0
-        
-        for idx, t in enumerate(to_clone, 1):
-            if idx % 10 == 0 or idx == len(to_clone):
-                log(f"  [{idx}/{len(to_clone)}] Processando...", 1)
-            
-            if clone_torrent_verified(src, dst, t):
-                success_batch.append((t.hash, t.name, t.category or '', t.size))
-            else:
-                failed += 1
-            
-            time.sleep(config.SYNC_INTERVAL)
-        
-        if success_batch:
-            log(f"\n  💾 Gravando {len(success_batch)} torrents no banco...", 1)
-            db.add_cloned_batch(success_batch)
-            log(f"  ✅ Banco atualizado em lote", 1)
-            cloned_something = True
-        
-        log(f"\n  📊 Clonados: {len(success_batch)} | Falhas: {failed}", 1)
-    else:
-        log(f"  ✅ Nada para clonar", 1)
+    # Estatísticas finais
+    stats = db.get_stats()
     
-    # PASSO 4: Remove órfãos
-    log("\n🗑️  [4/5] Limpando órfãos...", 1)
+    # Fases por destino ('clone:<destino>') x comuns ('snapshot', 'exporter'...)
+    phase_errors = {}
+    for phase_name, e in errors.items():
+        kind, _, phase_dst = phase_name.partition(':')
+        phase_errors.setdefault(phase_dst or None, []).append(f"{kind}: {e}")
     
-    dst_current = dst.torrents_info()
-    to_delete = [t for t in dst_current if t.hash not in origem_hashes]
+    log("\n" + "="*60, 1)
+    log("⚠️  SINCRONIZAÇÃO CONCLUÍDA COM ERROS" if errors else "✅ SINCRONIZAÇÃO CONCLUÍDA", 1)
+    log(f"  Origem: {stats['origem_count']} torrents ({stats['origem_size_gb']:.1f} GB)", 1)
+    for message in phase_errors.get(None, []):
+        log(f"  ❌ {message}", 0)
+    log_rate(src)
     
-    if to_delete:
-        log(f"  🗑️  {len(to_delete)} órfãos detectados", 1)
-        
-        deleted_batch = []
-        failed = 0
-        
-        for idx, t in enumerate(to_delete, 1):
-            if idx % 10 == 0 or idx == len(to_delete):
-                log(f"  [{idx}/{len(to_delete)}] Processando...", 1)
+    if cache and cache.hits + cache.misses > sum(cache_before):
+        log(f"  💽 Cache .torrent: {cache.hits - cache_before[0]} do disco | "
+            f"{cache.misses - cache_before[1]} exportados da origem", 1)
+    
+    for dst in destinations:
+        name = dst.name
+        # Fase que falhou ou foi pulada aparece como '-'
+        cloned, failed = results.get(f'clone:{name}', (None, '-'))
+        unwanted_stats = results.get(f'unwanted:{name}', {'downloading': 0, 'error': 0, 'total': 0})
+        dst_stats = db.get_stats(name)
+        
+        log(f"\n  🎯 {name}", 1)
+        log(f"  Clonados agora: {'-' if cloned is None else len(cloned)} | Falhas: {failed} | "
+            f"Órfãos: {results.get(f'orphans:{name}', '-')} | "
+            f"Reconciliados: {results.get(f'reconcile:{name}', '-')}", 1)
+        for message in phase_errors.get(name, []):
+            log(f"  ❌ {message}", 0)
+        log(f"  Histórico clonados: {dst_stats['cloned_count']} ({dst_stats['cloned_size_gb']:.1f} GB)", 1)
+        log(f"  Blacklist: {dst_stats['blacklist_count']} torrents", 1)
+        log_rate(dst)
+        
+        if unwanted_stats['total'] > 0:
+            log(f"  🚫 Removidos indesejados: {unwanted_stats['total']}", 1)
+            if unwanted_stats['downloading'] > 0:
+                log(f"     • Em download: {unwanted_stats['downloading']}", 1)
+            if unwanted_stats['error'] > 0:
+                log(f"     • Com erro: {unwanted_stats['error']}", 1)
+    
+    log("="*60, 1)
+    
+    # Sessão caída: o daemon reconecta; demais erros já foram reportados acima
+    for e in errors.values():
+        if is_connection_error(e):
+            raise e
+    
+    return errors
+
+
+# ==================== DAEMON ====================
+
+def run_daemon():
+    """
+    Modo daemon: mantém as sessões abertas e sincroniza continuamente
+    
+    A cada DAEMON_POLL_INTERVAL segundos consulta o delta do sync/maindata das
+    duas instâncias; roda execute_sync quando há mudança relevante (torrent
+    novo/removido, categoria, tags ou local alterados, ou estado que entra ou
+    sai de seeding/download/erro) ou quando DAEMON_INTERVAL segundos se
+    passaram desde o último ciclo. Mudanças feitas pelo próprio ciclo não
+    disparam outro (os espelhos avançam logo após execute_sync). Em falha de conexão descarta as
+    sessões e reconecta com backoff. SIGTERM/SIGINT interrompem o ciclo atual:
+    os envios em andamento terminam e nenhum lote ou fase novo começa.
+    """
+    poll_interval = getattr(config, 'DAEMON_POLL_INTERVAL', 30)
+    sync_interval = getattr(config, 'DAEMON_INTERVAL', 3600)
+    max_backoff = getattr(config, 'DAEMON_RECONNECT_MAX_DELAY', 300)
+    incremental = getattr(config, 'INCREMENTAL_SYNC', False)
+    
+    stop = threading.Event()
+    
+    def handle_signal(signum, frame):
+        log(f"\n🛑 Sinal {signal.Signals(signum).name} recebido, concluindo os envios em andamento e encerrando...", 1)
+        stop.set()
+    
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+    
+    log(f"\n👻 Modo: Daemon (poll {poll_interval}s | ciclo máximo {sync_interval}s)", 1)
+    
+    metrics_port = getattr(config, 'METRICS_PORT', None)
+    metrics_server = None
+    if metrics_port:
+        metrics_addr = getattr(config, 'METRICS_ADDR', '127.0.0.1')
+        try:
+            metrics_server = METRICS.serve(metrics_port, metrics_addr)
+            log(f"📈 Métricas em http://{metrics_addr}:{metrics_port}/metrics", 1)
+        except OSError as e:
+            log(f"⚠️  Métricas desativadas: {e}", 0)
+            log_error(f"Metrics server failed on {metrics_addr}:{metrics_port}: {e}")
+    
+    db = open_database()
+    clients = None
+    views = None
+    watchers = None
+    
+    # O daemon é o consumidor da fila do hook enquanto estiver rodando
+    queue_lock = QueueConsumerLock(config.DATABASE_FILE)
+    owns_queue = queue_lock.acquire()
+    if not owns_queue:
+        log("⚠️  Outro consumidor da fila do hook está ativo; fila não será drenada", 0)
+    backoff = poll_interval
+    last_sync = 0.0
+    
+    while not stop.is_set():
+        try:
+            if clients is None:
+                clients = get_clients(exit_on_error=False)
+                src, destinations = clients
+                connected_at = time.monotonic()
+                
+                # Espelhos vivem enquanto a sessão (e o rid dela) existir
+                if incremental:
+                    views = (InstanceMirror(src, 'origem'),
+                             [InstanceMirror(dst, dst.name) for dst in destinations])
+                    watchers = [views[0]] + views[1]
+                else:
+                    views = None
+                    watchers = [InstanceMirror(src, 'origem')] + [InstanceMirror(dst, dst.name) for dst in destinations]
+                
+                # Força ciclo completo após (re)conectar
+                last_sync = 0.0
             
-            if delete_torrent_verified(dst, t):
-                deleted_batch.append((t.hash, t.name))
-            else:
-                failed += 1
+            queue_size = db.hook_queue_size()
+            METRICS.set('hook_queue_depth', queue_size)
+            if owns_queue and queue_size:
+                drain_hook_queue(*clients, db, stop)
             
-            time.sleep(0.3)
-        
-        if deleted_batch:
-            log(f"\n  💾 Atualizando banco ({len(deleted_batch)} remoções)...", 1)
-            db.remove_cloned_batch(deleted_batch)
-            log(f"  ✅ Banco atualizado em lote", 1)
+            if stop.is_set():
+                break
+            
+            # Destino que falhou no login: nova tentativa a cada DAEMON_INTERVAL
+            if (len(destinations) < len(get_destination_configs())
+                    and time.monotonic() - connected_at >= sync_interval):
+                log("\n🔌 Reconectando para incluir destinos indisponíveis...", 1)
+                clients = None
+                continue
+            
+            changes = sum(w.refresh() for w in watchers)
+            due = time.monotonic() - last_sync >= sync_interval
+            
+            if changes or due:
+                reason = f"{changes} mudanças detectadas" if changes else "intervalo atingido"
+                log(f"\n🔁 Ciclo de sincronização ({reason})", 1)
+                execute_sync(clients=clients, db=db, views=views, stop=stop)
+                write_metrics_textfile()
+                last_sync = time.monotonic()
+                
+                # Clonagens, remoções e reconciliações do próprio ciclo não são
+                # mudanças externas: avança os espelhos e descarta a contagem
+                for w in watchers:
+                    w.refresh()
+            
+            backoff = poll_interval
+            
+        except Exception as e:
+            # Só falha de conexão/sessão descarta as sessões e os espelhos
+            if clients is None or is_connection_error(e):
+                log(f"\n❌ Erro no ciclo: {e} (reconectando em {backoff:.0f}s)", 0)
+                clients = None
+            else:
+                log(f"\n❌ Erro no ciclo: {e} (nova tentativa em {backoff:.0f}s)", 0)
+            log_error(f"Daemon cycle error: {e}")
+            stop.wait(backoff)
+            backoff = min(max_backoff, backoff * 2)
+            continue
         
-        action = "deletados" if config.CLEANUP_MODE == 'delete' else "removidos"
-        log(f"\n  📊 {action}: {len(deleted_batch)} | Falhas: {failed}", 1)
-    else:
-        log(f"  ✅ Sem órfãos", 1)
+        stop.wait(poll_interval)
     
-    # ⏰ AGUARDA 10 SEGUNDOS SE CLONOU ALGO
-    if cloned_something:
-        log("\n⏰ Aguardando 10 segundos para qBittorrent processar...", 1)
-        for i in range(10, 0, -1):
-            log(f"  {i}s...", 1)
-            time.sleep(1)
-    
-    # PASSO 5: Remove torrents indesejados + adiciona blacklist
-    log("\n🚫 [5/5] Verificando torrents indesejados...", 1)
-    unwanted_stats = remove_unwanted_torrents(dst, db)
-    
-    # Estatísticas finais
-    stats = db.get_stats()
+    if clients:
+        src, destinations = clients
+        for client in [src] + destinations:
+            try:
+                client.auth_log_out()
+            except Exception:
+                pass
     
-    log("\n" + "="*60, 1)
-    log("✅ SINCRONIZAÇÃO CONCLUÍDA", 1)
-    log(f"  Origem: {stats['origem_count']} torrents ({stats['origem_size_gb']:.1f} GB)", 1)
-    log(f"  Histórico clonados: {stats['cloned_count']} ({stats['cloned_size_gb']:.1f} GB)", 1)
-    log(f"  Blacklist: {stats['blacklist_count']} torrents", 1)
+    queue_lock.release()
     
-    if unwanted_stats['total'] > 0:
-        log(f"\n  🚫 Removidos indesejados: {unwanted_stats['total']}", 1)
-        if unwanted_stats['downloading'] > 0:
-            log(f"     • Em download: {unwanted_stats['downloading']}", 1)
-        if unwanted_stats['error'] > 0:
-            log(f"     • Com erro: {unwanted_stats['error']}", 1)
+    if metrics_server is not None:
+        metrics_server.shutdown()
     
-    log("="*60, 1)
+    log("👋 Daemon encerrado", 1)
 
 
 # ==================== MAIN ====================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Sincroniza torrents em seeding entre instâncias qBittorrent')
+    parser.add_argument('hash', nargs='?', help='Hash único a clonar (modo hook)')
+    parser.add_argument('--daemon', action='store_true', help='Executa continuamente mantendo as sessões abertas')
+    parser.add_argument('--drain-queue', action='store_true', help='Consome a fila de hashes enviados pelo hook')
+    args = parser.parse_args()
+    
+    # Hook: só enfileira e retorna (sem banner, sem login)
+    if args.hash and getattr(config, 'HOOK_QUEUE', True):
+        try:
+            enqueue_from_hook(args.hash)
+        except Exception as e:
+            log(f"❌ Erro ao enfileirar: {e}", 0)
+            log_error(f"Enqueue error {args.hash}: {e}")
+            sys.exit(1)
+        sys.exit(0)
+    
     log("="*60, 1)
     log("  qBittorrent Clone Tool v5.0", 1)
     log("  Upload-Only + Smart Blacklist", 1)
     log("="*60, 1)
     
-    single_hash = sys.argv[1] if len(sys.argv) > 1 else None
-    
     try:
-        execute_sync(single_hash)
+        if args.daemon:
+            run_daemon()
+        elif args.drain_queue:
+            run_queue_consumer()
+            write_metrics_textfile()
+        else:
+            errors = execute_sync(args.hash)
+            write_metrics_textfile()
+            if errors:
+                sys.exit(1)
     except KeyboardInterrupt:
         log("\n⚠️  Interrompido", 0)
         sys.exit(0)
     except Exception as e:
         log(f"\n❌ Erro fatal: {e}", 0)
         log_error(f"Fatal: {e}")
-        sys.exit(1)
\ No newline at end of file
+        sys.exit(1)